@@ -1,14 +1,24 @@
 from flask import Flask, jsonify
 from flask_cors import CORS
+from services.encoding import OrjsonProvider
 from routes.autofill import autofill_bp  # autofill route
 from routes.getInfo import getInfo_bp  # getInfo route
+from routes.metrics import metrics_bp  # /metrics route and Server-Timing hooks
+from routes.screen import screen_bp  # batch screening route
+from routes.leaderboard import leaderboard_bp  # market-wide leaderboard route
+from routes.export import export_bp  # Parquet/Arrow export route
 
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)  # orjson for every JSON response
 CORS(app)  # allow requests from React
 
 app.register_blueprint(autofill_bp)  # register autofill blueprint
 app.register_blueprint(getInfo_bp)  # register getInfo blueprint
+app.register_blueprint(metrics_bp)  # register metrics blueprint
+app.register_blueprint(screen_bp)  # register screen blueprint
+app.register_blueprint(leaderboard_bp)  # register leaderboard blueprint
+app.register_blueprint(export_bp)  # register export blueprint
 
 if __name__ == "__main__":
     import os
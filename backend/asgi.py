@@ -0,0 +1,180 @@
+"""
+Async serving mode.
+
+    uvicorn asgi:app --host 0.0.0.0 --port $PORT
+
+/getInfo runs natively on the event loop using the awaitable pipeline in
+services.sec_async, so one process can hold hundreds of lookups in flight.
+Every other route is served by the Flask app through asgiref's WSGI adapter.
+"""
+
+import asyncio
+import contextvars
+import re
+from urllib.parse import parse_qs
+
+import httpx
+from asgiref.wsgi import WsgiToAsgi
+
+from app import app as flask_app
+from routes.metrics import timing_requested
+from routes.getInfo import (
+    cache_control,
+    cache_key,
+    cacheable,
+    company_payload,
+    format_stock_data,
+    get_company_by_cik,
+    normalize_cik,
+    store_payload,
+)
+from services import sec_async
+from services.encoding import dumps, representation
+from services.metrics import CACHE_REQUESTS, server_timing_header, span, start_request_timing
+from services.response_cache import response_cache
+from services.stockPrice import get_stock_data
+
+GETINFO_PATH = re.compile(r"/getInfo/([^/]+)")
+
+wsgi_app = WsgiToAsgi(flask_app)
+# Strong references to background refresh tasks so they are not garbage collected
+_refresh_tasks = set()
+
+
+async def _timed(stage, awaitable):
+    with span(stage):
+        return await awaitable
+
+
+async def build_company_payload_async(CIK):
+    """Awaitable version of routes.getInfo.build_company_payload."""
+    padded_cik = CIK.zfill(10)
+    ticker, _ = await asyncio.to_thread(get_company_by_cik, int(CIK))
+    loop = asyncio.get_running_loop()
+
+    # SEC lookups and the yfinance download are independent, so run them together
+    # and a failed Form 4 lookup cancels the others instead of spending SEC budget on a failed request
+    owner_data, stock_data_raw, sentiment = await sec_async.gather_or_cancel([
+        _timed("form4", sec_async.get_company_async(padded_cik)),
+        _timed("yfinance", loop.run_in_executor(None, get_stock_data, ticker, "1y", "1d")),
+        _timed("sentiment", sec_async.get_sentiment_async(int(CIK))),
+    ])
+    return company_payload(CIK, owner_data, ticker, format_stock_data(stock_data_raw), sentiment)
+
+
+def _error_payload(CIK, e):
+    if isinstance(e, httpx.HTTPStatusError):
+        if e.response.status_code == 429:
+            return {
+                "success": False,
+                "error": "SEC API rate limit exceeded. Please wait and try again.",
+                "error_type": "rate_limit",
+                "cik": CIK
+            }, 429
+        return {"success": False, "error": f"HTTP error occurred: {str(e)}", "cik": CIK}, 404
+    if isinstance(e, httpx.RequestError):
+        return {"success": False, "error": f"Error fetching data from SEC: {str(e)}", "cik": CIK}, 500
+    return {"success": False, "error": f"An error occurred: {str(e)}", "cik": CIK}, 500
+
+
+async def _store_payload(CIK, payload):
+    return await asyncio.to_thread(store_payload, CIK, payload)
+
+
+async def _refresh(CIK):
+    try:
+        await _store_payload(CIK, await build_company_payload_async(CIK))
+    except Exception as e:
+        print(f"Background refresh failed for CIK {CIK}: {e}")
+    finally:
+        await asyncio.to_thread(response_cache.release_refresh, cache_key(CIK))
+
+
+def _etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/").strip('"') == etag for tag in candidates)
+
+
+async def _send(send, status, body, headers, head=False):
+    headers = [(b"access-control-allow-origin", b"*")] + headers
+    timing = server_timing_header()
+    if timing:
+        headers.append((b"server-timing", timing.encode()))
+    if body is not None:
+        headers.append((b"content-length", str(len(body)).encode()))
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": b"" if head or body is None else body})
+
+
+async def _send_cached(scope, send, entry, cache_status):
+    request_headers = dict(scope["headers"])
+    shape = parse_qs(scope.get("query_string", b"").decode()).get("shape", [None])[-1]
+    body, etag, encoding = await asyncio.to_thread(
+        representation, entry.body, entry.etag, shape, request_headers.get(b"accept-encoding", b"").decode()
+    )
+    headers = [
+        (b"etag", f'"{etag}"'.encode()),
+        (b"vary", b"Accept-Encoding"),
+        (b"cache-control", cache_control(cache_status).encode()),
+        (b"x-cache", cache_status.encode()),
+    ]
+    if _etag_matches(request_headers.get(b"if-none-match", b"").decode(), etag):
+        await _send(send, 304, None, headers)
+        return
+    headers.append((b"content-type", b"application/json"))
+    if encoding:
+        headers.append((b"content-encoding", encoding.encode()))
+    await _send(send, 200, body, headers, head=scope["method"] == "HEAD")
+
+
+async def get_info(scope, send, CIK):
+    start_request_timing(timing_requested(parse_qs(scope.get("query_string", b"").decode())))
+
+    with span("cache_lookup"):
+        entry = await asyncio.to_thread(response_cache.get, cache_key(CIK))
+    if entry is not None:
+        fresh = response_cache.is_fresh(entry)
+        CACHE_REQUESTS.inc(cache="getinfo", result="hit" if fresh else "stale")
+        if not fresh and await asyncio.to_thread(response_cache.claim_refresh, cache_key(CIK)):
+            # Refresh outside this request so its spans don't land in our Server-Timing
+            task = asyncio.create_task(_refresh(CIK), context=contextvars.Context())
+            _refresh_tasks.add(task)
+            task.add_done_callback(_refresh_tasks.discard)
+        await _send_cached(scope, send, entry, "HIT" if fresh else "STALE")
+        return
+
+    CACHE_REQUESTS.inc(cache="getinfo", result="miss")
+    try:
+        payload = await build_company_payload_async(CIK)
+        entry = await _store_payload(CIK, payload)
+    except Exception as e:
+        payload, status = _error_payload(CIK, e)
+        body = dumps(payload)
+        await _send(send, status, body, [(b"content-type", b"application/json")])
+        return
+    await _send_cached(scope, send, entry, "MISS" if cacheable(payload) else "BYPASS")
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await sec_async.aclose()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+    if scope["type"] == "http" and scope["method"] in ("GET", "HEAD"):
+        match = GETINFO_PATH.fullmatch(scope["path"])
+        if match:
+            await get_info(scope, send, normalize_cik(match.group(1)))
+            return
+    await wsgi_app(scope, receive, send)
@@ -0,0 +1,181 @@
+"""
+Parity check and benchmark for the embedding backends in services.ai_tools.
+
+Run from backend/:
+
+    python -m benchmarks.embedding_backends                         # torch vs onnx vs onnx-int8
+    python -m benchmarks.embedding_backends --backends torch,onnx-int8 --threads 1,4
+
+Each backend runs in its own process (EMBEDDING_BACKEND / EMBEDDING_THREADS set
+before services.ai_tools is imported), so resident memory is measured per
+backend. Every backend embeds the same deterministic corpus of 8-K style
+passages through get_embeddings; torch is the reference (run even when it is
+not in --backends), and each other backend must reach --min-cosine (per text,
+against the torch vector) or the run exits 1. A worker whose backend fell back
+to torch at load fails the run instead of reporting torch numbers.
+
+Reported per backend and thread count: load time, RSS after load and peak
+RSS, batched sentences/sec, single-text get_embedding latency, and min/mean
+cosine similarity to torch.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from .fixtures import _ITEMS, _SENTENCES
+from .run import DEFAULT_RESULTS, _git_commit
+
+# Quantization costs some precision; full-precision ONNX should match torch almost exactly
+DEFAULT_MIN_COSINE = {"onnx": 0.999, "onnx-int8": 0.97}
+
+
+def corpus(n=512, seed=11):
+    """Deterministic passages from one sentence up to a long multi-item narrative."""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(n):
+        item, title = rng.choice(_ITEMS)
+        body = " ".join(rng.choice(_SENTENCES) for _ in range(rng.choice([1, 2, 4, 8, 16])))
+        texts.append(f"{item} {title}. {body}")
+    return texts
+
+
+def _rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def worker(out_path, n_texts, batch_size, single_calls):
+    """Runs inside the child process: load the configured backend, embed the corpus, save vectors."""
+    start = time.perf_counter()
+    from services import ai_tools
+    load_s = time.perf_counter() - start
+    if ai_tools.model is None:
+        raise SystemExit("Embedding model failed to load")
+    if ai_tools.embedding_backend != ai_tools.EMBEDDING_BACKEND:
+        raise SystemExit(f"Requested {ai_tools.EMBEDDING_BACKEND} but loaded {ai_tools.embedding_backend}")
+
+    texts = corpus(n_texts)
+    ai_tools.get_embeddings(texts[:batch_size], batch_size=batch_size)  # warm-up
+
+    start = time.perf_counter()
+    vectors = ai_tools.get_embeddings(texts, batch_size=batch_size)
+    batch_s = time.perf_counter() - start
+
+    single = []
+    for text in texts[:single_calls]:
+        start = time.perf_counter()
+        ai_tools.get_embedding(text)
+        single.append(time.perf_counter() - start)
+
+    np.save(out_path, np.asarray(vectors, dtype=np.float32))
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({
+        "load_s": load_s,
+        "rss_mb": _rss_mb(),
+        "peak_rss_mb": peak_mb,
+        "sentences_per_s": len(texts) / batch_s,
+        "single_p50_ms": statistics.median(single) * 1000,
+    }))
+
+
+def run_backend(backend, threads, args, tmp):
+    out_path = os.path.join(tmp, f"{backend}-{threads}.npy")
+    env = {**os.environ, "EMBEDDING_BACKEND": backend, "EMBEDDING_THREADS": str(threads)}
+    proc = subprocess.run(
+        [sys.executable, "-m", "benchmarks.embedding_backends", "--worker", out_path,
+         "--texts", str(args.texts), "--batch-size", str(args.batch_size), "--single", str(args.single)],
+        env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        print(proc.stdout + proc.stderr)
+        raise SystemExit(f"{backend} (threads={threads}) failed")
+    stats = json.loads(proc.stdout.strip().splitlines()[-1])
+    return stats, np.load(out_path)
+
+
+def cosine(a, b):
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return np.sum(a * b, axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default="torch,onnx,onnx-int8")
+    parser.add_argument("--threads", default="0", help="comma-separated EMBEDDING_THREADS values (0 = library default)")
+    parser.add_argument("--texts", type=int, default=512)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--single", type=int, default=50, help="single-text get_embedding calls to time")
+    parser.add_argument("--min-cosine", type=float, help="parity threshold for every non-torch backend")
+    parser.add_argument("--out", default=DEFAULT_RESULTS)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.texts, args.batch_size, args.single)
+        return
+
+    backends = args.backends.split(",")
+    thread_counts = [int(t) for t in args.threads.split(",")]
+    metrics, failed = {}, []
+    with tempfile.TemporaryDirectory() as tmp:
+        reference = None
+        if "torch" not in backends:
+            # Parity is always checked, so run the reference even when torch is not being measured
+            print("Running torch reference...")
+            _, reference = run_backend("torch", 0, args, tmp)
+        # torch first: it is the parity reference
+        for backend in sorted(backends, key=lambda b: b != "torch"):
+            for threads in thread_counts:
+                print(f"Running {backend} (threads={threads or 'default'})...")
+                stats, vectors = run_backend(backend, threads, args, tmp)
+                prefix = f"embedding.{backend}.t{threads}"
+                metrics.update({f"{prefix}.{name}": value for name, value in stats.items()})
+                if backend == "torch":
+                    reference = vectors if reference is None else reference
+                    continue
+                similarity = cosine(vectors, reference)
+                metrics[f"{prefix}.cosine_min"] = float(similarity.min())
+                metrics[f"{prefix}.cosine_mean"] = float(similarity.mean())
+                threshold = args.min_cosine if args.min_cosine is not None else DEFAULT_MIN_COSINE[backend]
+                if similarity.min() < threshold:
+                    failed.append(f"{backend} (threads={threads}): min cosine {similarity.min():.4f} < {threshold}")
+
+    for name, value in metrics.items():
+        print(f"  {name:50s} {value:12.4f}")
+
+    os.makedirs(args.out, exist_ok=True)
+    out_path = os.path.join(args.out, "embedding-" + datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    with open(out_path, "w") as f:
+        json.dump({
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "config": vars(args),
+            "metrics": metrics,
+        }, f, indent=2)
+    print(f"Saved results to {out_path}")
+
+    if failed:
+        print("Parity check failed:\n  " + "\n  ".join(failed))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Local stand-in for SEC EDGAR and the price source.
+
+Serves a fixture directory laid out by benchmarks.fixtures:
+
+    <fixtures>/sec/submissions/CIK0000320193.json          -> /submissions/CIK0000320193.json
+    <fixtures>/sec/Archives/edgar/data/.../index.html      -> /Archives/edgar/data/.../
+    <fixtures>/prices/AAPL.json                            -> /prices/AAPL.json
+
+Every response is delayed by latency +/- jitter, and SEC paths answer 429 with
+probability rate_429, so rate-limit handling can be exercised on purpose.
+
+    python -m benchmarks.fake_server --fixtures benchmarks/fixtures/synthetic --latency-ms 80 --rate-429 0.02
+"""
+
+import argparse
+import mimetypes
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlparse
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        path = unquote(urlparse(self.path).path)
+
+        delay = server.latency + random.uniform(-server.jitter, server.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        is_price = path.startswith("/prices/")
+        if not is_price and random.random() < server.rate_429:
+            server.count("rate_limited")
+            self._send(429, b"Request Rate Threshold Exceeded", "text/plain", {"Retry-After": "1"})
+            return
+
+        root = server.fixtures if is_price else os.path.join(server.fixtures, "sec")
+        file_path = os.path.normpath(os.path.join(root, path.lstrip("/")))
+        if path.endswith("/"):
+            file_path = os.path.join(file_path, "index.html")
+        if not file_path.startswith(os.path.abspath(server.fixtures)) or not os.path.isfile(file_path):
+            server.count("not_found")
+            self._send(404, b"Not Found", "text/plain")
+            return
+
+        with open(file_path, "rb") as f:
+            body = f.read()
+        server.count("ok")
+        content_type = mimetypes.guess_type(file_path)[0] or "application/octet-stream"
+        self._send(200, body, content_type)
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeEdgarServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, fixtures, latency_ms=0, jitter_ms=0, rate_429=0.0, host="127.0.0.1", port=0):
+        super().__init__((host, port), _Handler)
+        self.fixtures = os.path.abspath(fixtures)
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.rate_429 = rate_429
+        self.stats = {"ok": 0, "rate_limited": 0, "not_found": 0}
+        self._stats_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def start(self):
+        """Serve on a background thread; returns self for chaining."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", required=True)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = FakeEdgarServer(args.fixtures, args.latency_ms, args.jitter_ms, args.rate_429, port=args.port)
+    print(f"Serving {server.fixtures} at {server.url} (set SEC_BASE_URL and PRICE_SOURCE_URL to this)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+"""
+Fixture sets for the benchmark suite.
+
+    python -m benchmarks.fixtures generate benchmarks/fixtures/synthetic
+    python -m benchmarks.fixtures record benchmarks/fixtures/recorded 320193 789019
+
+`generate` writes a deterministic synthetic set (same seed, same bytes) so runs
+are comparable on any machine. `record` captures real submissions JSON, Form 4
+index pages and XML, 8-K documents and a year of prices for the given CIKs
+(plus two years of the benchmark index), pacing requests under SEC's fair-access limit. Both produce the layout served
+by benchmarks.fake_server.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+import requests
+
+DEFAULT_CIKS = [320193, 789019, 1045810]
+FORM4_PER_ISSUER = 60
+EIGHT_K_PER_ISSUER = 12
+# Same setting as services.scoring, read here so generating fixtures imports no app modules
+BENCHMARK_TICKER = os.environ.get("BENCHMARK_TICKER", "SPY")
+
+_OWNERS = [
+    ("0009000001", "Doe Jane A", ("0", "1", "Chief Executive Officer")),
+    ("0009000002", "Roe Richard", ("0", "1", "Chief Financial Officer")),
+    ("0009000003", "Park Min-jun", ("0", "1", "Chief Operating Officer")),
+    ("0009000004", "Okafor Chidi", ("1", "0", "")),
+    ("0009000005", "Lindqvist Ingrid", ("1", "0", "")),
+    ("0009000006", "Moreau Claire", ("1", "0", "")),
+    ("0009000007", "Silva Rafael", ("0", "1", "General Counsel")),
+    ("0009000008", "O'Neil Siobhan", ("0", "1", "Senior Vice President")),
+]
+
+_ITEMS = [
+    ("Item 2.02", "Results of Operations and Financial Condition"),
+    ("Item 5.02", "Departure of Directors or Certain Officers"),
+    ("Item 7.01", "Regulation FD Disclosure"),
+    ("Item 8.01", "Other Events"),
+    ("Item 1.01", "Entry into a Material Definitive Agreement"),
+]
+
+_SENTENCES = [
+    "The Company reported revenue growth driven by strong demand across all geographic segments.",
+    "Net sales decreased compared to the prior year quarter due to lower unit volumes.",
+    "The Board of Directors declared a cash dividend payable to shareholders of record.",
+    "The Company announced the resignation of its Chief Financial Officer effective immediately.",
+    "The agreement provides for a revolving credit facility with an aggregate commitment of up to five billion dollars.",
+    "Gross margin was negatively impacted by higher component costs and foreign exchange headwinds.",
+    "The Company repurchased shares of its common stock under the previously announced program.",
+    "Management reaffirmed its full year guidance for operating income and earnings per share.",
+]
+
+
+def _write(root, rel_path, content):
+    path = os.path.join(root, rel_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    mode = "wb" if isinstance(content, bytes) else "w"
+    with open(path, mode) as f:
+        f.write(content)
+
+
+def _tickers():
+    path = os.path.join(os.path.dirname(__file__), "..", "company_tickers.json")
+    with open(path) as f:
+        return {entry["cik_str"]: entry for entry in json.load(f).values()}
+
+
+def _index_html(cik, accession, xml_name):
+    base = f"/Archives/edgar/data/{cik}/{accession}"
+    return (
+        f"<html><head><title>Index of {base}</title></head><body><table>"
+        f'<tr><td><a href="{base}/{accession[:10]}-{accession[10:12]}-{accession[12:]}.txt">full submission</a></td></tr>'
+        f'<tr><td><a href="{base}/{xml_name}">{xml_name}</a></td></tr>'
+        f'<tr><td><a href="{base}/xslF345X05/{xml_name}">rendered</a></td></tr>'
+        "</table></body></html>"
+    )
+
+
+def _transaction_xml(rng, tag, day, derivative):
+    code = rng.choice(["S", "P", "M", "F", "A", "G"])
+    acquired = "A" if code in ("P", "M", "A") else "D"
+    shares = rng.randint(100, 250000)
+    parts = [
+        f"<{tag}>",
+        "<securityTitle><value>" + ("Restricted Stock Unit" if derivative else "Common Stock") + "</value></securityTitle>",
+        f"<transactionDate><value>{day.isoformat()}</value></transactionDate>",
+        f"<transactionCoding><transactionFormType>4</transactionFormType><transactionCode>{code}</transactionCode>"
+        "<equitySwapInvolved>0</equitySwapInvolved></transactionCoding>",
+        "<transactionAmounts>",
+        f"<transactionShares><value>{shares}</value></transactionShares>",
+        f"<transactionPricePerShare><value>{rng.uniform(20, 400):.2f}</value></transactionPricePerShare>",
+        f"<transactionAcquiredDisposedCode><value>{acquired}</value></transactionAcquiredDisposedCode>",
+        "</transactionAmounts>",
+    ]
+    if derivative:
+        parts.append("<conversionOrExercisePrice><footnoteId id=\"F1\"/></conversionOrExercisePrice>")
+        parts.append(
+            "<underlyingSecurity><underlyingSecurityTitle><value>Common Stock</value></underlyingSecurityTitle>"
+            f"<underlyingSecurityShares><value>{shares}</value></underlyingSecurityShares></underlyingSecurity>"
+        )
+    parts.append(
+        "<postTransactionAmounts><sharesOwnedFollowingTransaction>"
+        f"<value>{rng.randint(shares, shares * 40)}</value>"
+        "</sharesOwnedFollowingTransaction></postTransactionAmounts>"
+    )
+    parts.append("<ownershipNature><directOrIndirectOwnership><value>D</value></directOrIndirectOwnership></ownershipNature>")
+    parts.append(f"</{tag}>")
+    return "".join(parts)
+
+
+def _form4_xml(rng, cik, title, ticker, day):
+    owners = rng.sample(_OWNERS, rng.choice([1, 1, 1, 2]))
+    owner_xml = "".join(
+        "<reportingOwner><reportingOwnerId>"
+        f"<rptOwnerCik>{owner_cik}</rptOwnerCik><rptOwnerName>{name}</rptOwnerName>"
+        "</reportingOwnerId><reportingOwnerRelationship>"
+        f"<isDirector>{director}</isDirector><isOfficer>{officer}</isOfficer>"
+        f"<officerTitle>{officer_title}</officerTitle><isTenPercentOwner>0</isTenPercentOwner><isOther>0</isOther>"
+        "</reportingOwnerRelationship></reportingOwner>"
+        for owner_cik, name, (director, officer, officer_title) in owners
+    )
+    non_deriv = "".join(_transaction_xml(rng, "nonDerivativeTransaction", day, False) for _ in range(rng.randint(1, 6)))
+    deriv = "".join(_transaction_xml(rng, "derivativeTransaction", day, True) for _ in range(rng.randint(0, 3)))
+    return (
+        '<?xml version="1.0"?>\n<ownershipDocument><schemaVersion>X0508</schemaVersion>'
+        f"<documentType>4</documentType><periodOfReport>{day.isoformat()}</periodOfReport>"
+        f"<issuer><issuerCik>{cik:010d}</issuerCik><issuerName>{title}</issuerName>"
+        f"<issuerTradingSymbol>{ticker}</issuerTradingSymbol></issuer>"
+        f"{owner_xml}<nonDerivativeTable>{non_deriv}</nonDerivativeTable>"
+        f"<derivativeTable>{deriv}</derivativeTable>"
+        "<footnotes><footnote id=\"F1\">Each restricted stock unit represents a contingent right to receive one share.</footnote></footnotes>"
+        "</ownershipDocument>"
+    )
+
+
+def _eight_k_html(rng, title, day):
+    items = rng.sample(_ITEMS, rng.randint(1, 3))
+    body = [
+        f"<html><head><title>{title} 8-K</title></head><body>",
+        "<div><p>UNITED STATES SECURITIES AND EXCHANGE COMMISSION</p><p>FORM 8-K</p>",
+        f"<p>Date of Report: {day.strftime('%B %d, %Y')}</p></div>",
+    ]
+    for heading, caption in items:
+        body.append(f"<div><p><b>{heading}. {caption}.</b></p>")
+        for _ in range(rng.randint(8, 40)):
+            body.append("<p>" + " ".join(rng.choice(_SENTENCES) for _ in range(rng.randint(3, 8))) + "</p>")
+        body.append("</div>")
+    body.append("<div><p>SIGNATURE</p><p>Pursuant to the requirements of the Securities Exchange Act of 1934.</p></div>")
+    body.append("</body></html>")
+    return "".join(body)
+
+
+def _business_days(end, count):
+    days = []
+    day = end
+    while len(days) < count:
+        if day.weekday() < 5:
+            days.append(day)
+        day -= timedelta(days=1)
+    return sorted(days)
+
+
+def generate(dest, ciks=DEFAULT_CIKS, seed=1234, end=date(2025, 9, 30)):
+    """Write a deterministic synthetic fixture set for the given CIKs."""
+    rng = random.Random(seed)
+    tickers = _tickers()
+    trading_days = _business_days(end, 252)
+
+    # Two years of the benchmark index; issuer prices load on its daily returns
+    index_days = _business_days(end, 504)
+    level, index_prices, index_returns = 400.0, [], {}
+    for day in index_days:
+        index_returns[day] = rng.gauss(0.0003, 0.011)
+        level *= 1 + index_returns[day]
+        index_prices.append({"Date": day.isoformat(), "Close": round(level, 4)})
+    _write(dest, f"prices/{BENCHMARK_TICKER}.json", json.dumps(index_prices))
+
+    for cik in ciks:
+        entry = tickers[cik]
+        ticker, title = entry["ticker"], entry["title"]
+
+        filings = []
+        for n in range(FORM4_PER_ISSUER):
+            day = trading_days[-1 - n * 4 % len(trading_days)]
+            accession = f"{cik:010d}{day.year % 100:02d}{n + 1:06d}"
+            xml_name = f"wk-form4_{n + 1}.xml"
+            filings.append((day, "4", accession, f"xslF345X05/{xml_name}"))
+            _write(dest, f"sec/Archives/edgar/data/{cik}/{accession}/index.html", _index_html(cik, accession, xml_name))
+            _write(dest, f"sec/Archives/edgar/data/{cik}/{accession}/{xml_name}", _form4_xml(rng, cik, title, ticker, day))
+
+        for n in range(EIGHT_K_PER_ISSUER):
+            day = trading_days[-3 - n * 20 % len(trading_days)]
+            accession = f"{cik:010d}{day.year % 100:02d}{500 + n:06d}"
+            doc = f"{ticker.lower()}-{day.strftime('%Y%m%d')}.htm"
+            filings.append((day, "8-K", accession, doc))
+            _write(dest, f"sec/Archives/edgar/data/{cik}/{accession}/{doc}", _eight_k_html(rng, title, day))
+
+        filings.sort(key=lambda f: f[0], reverse=True)
+        submissions = {
+            "cik": str(cik),
+            "name": title,
+            "tickers": [ticker],
+            "sic": "3571",
+            "sicDescription": "Electronic Computers",
+            "filings": {"recent": {
+                "accessionNumber": [f"{a[:10]}-{a[10:12]}-{a[12:]}" for _, _, a, _ in filings],
+                "filingDate": [d.isoformat() for d, _, _, _ in filings],
+                "form": [form for _, form, _, _ in filings],
+                "primaryDocument": [doc for _, _, _, doc in filings],
+            }},
+        }
+        _write(dest, f"sec/submissions/CIK{cik:010d}.json", json.dumps(submissions))
+
+        price = rng.uniform(50, 400)
+        beta = rng.uniform(0.7, 1.4)
+        prices = []
+        for day in trading_days:
+            price *= 1 + beta * index_returns[day] + rng.gauss(0.0001, 0.013)
+            prices.append({"Date": day.isoformat(), "Close": round(price, 4)})
+        _write(dest, f"prices/{ticker}.json", json.dumps(prices))
+
+    print(f"Wrote synthetic fixtures for {len(ciks)} issuers to {dest}")
+
+
+def record(dest, ciks, user_agent, pause=0.15):
+    """Capture live SEC responses and a year of prices for the given CIKs."""
+    from services.form4_parser import find_form4_xml_url
+    from services.stockPrice import get_stock_data
+
+    session = requests.Session()
+    session.headers["User-Agent"] = user_agent
+    tickers = _tickers()
+
+    def fetch(url):
+        time.sleep(pause)  # stay well under 10 requests/second
+        resp = session.get(url, timeout=30)
+        resp.raise_for_status()
+        return resp.content
+
+    for cik in ciks:
+        body = fetch(f"https://data.sec.gov/submissions/CIK{cik:010d}.json")
+        _write(dest, f"sec/submissions/CIK{cik:010d}.json", body)
+        recent = json.loads(body)["filings"]["recent"]
+
+        form4 = [a for a, f in zip(recent["accessionNumber"], recent["form"]) if f == "4"][:50]
+        for accession in form4:
+            accession = accession.replace("-", "")
+            path = f"/Archives/edgar/data/{cik}/{accession}/"
+            index_html = fetch("https://www.sec.gov" + path)
+            _write(dest, f"sec{path}index.html", index_html)
+            xml_url = find_form4_xml_url(index_html.decode("utf-8", "replace"), cik, accession)
+            if xml_url:
+                _write(dest, "sec" + xml_url[len("https://www.sec.gov"):], fetch(xml_url))
+
+        eight_k = [
+            (a, d) for a, f, d in zip(recent["accessionNumber"], recent["form"], recent["primaryDocument"]) if f == "8-K"
+        ][:10]
+        for accession, doc in eight_k:
+            path = f"/Archives/edgar/data/{cik}/{accession.replace('-', '')}/{doc}"
+            _write(dest, "sec" + path, fetch("https://www.sec.gov" + path))
+
+        ticker = tickers[cik]["ticker"]
+        _write(dest, f"prices/{ticker}.json", json.dumps(get_stock_data(ticker, period="1y", interval="1d")))
+        print(f"Recorded CIK {cik} ({ticker}): {len(form4)} Form 4, {len(eight_k)} 8-K")
+
+    _write(dest, f"prices/{BENCHMARK_TICKER}.json", json.dumps(get_stock_data(BENCHMARK_TICKER, period="2y", interval="1d")))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    gen = sub.add_parser("generate")
+    gen.add_argument("dest")
+    gen.add_argument("ciks", nargs="*", type=int, default=DEFAULT_CIKS)
+    gen.add_argument("--seed", type=int, default=1234)
+    rec = sub.add_parser("record")
+    rec.add_argument("dest")
+    rec.add_argument("ciks", nargs="+", type=int)
+    rec.add_argument("--user-agent", default=os.environ.get("SEC_USER_AGENT"))
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        generate(args.dest, args.ciks, args.seed)
+    else:
+        if not args.user_agent:
+            sys.exit("SEC requires a contact User-Agent: pass --user-agent or set SEC_USER_AGENT")
+        record(args.dest, args.ciks, args.user_agent)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+"""
+Benchmark suite for the lookup pipeline.
+
+Run from backend/:
+
+    python -m benchmarks.run                                   # synthetic fixtures, no latency
+    python -m benchmarks.run --latency-ms 80 --rate-429 0.01   # closer to real EDGAR
+    python -m benchmarks.run --compare benchmarks/results/baseline.json
+
+Suites:
+    parse    parse time per Form 4 index page, Form 4 XML and 8-K document
+    scoring  integrity_score throughput on synthetic trades, with the
+             mean-return CAR and with the market-model CAR (fit included)
+    serialize  encode time and bytes on the wire for a large synthetic /getInfo
+             payload: stdlib json vs orjson, rows vs columnar, identity/gzip/br
+    e2e      /getInfo latency (cold, cache disabled) per issuer, then throughput
+             and latency percentiles under N concurrent clients
+
+SEC and price requests are answered by benchmarks.fake_server from a fixture
+directory (generated on first use). Sentiment goes through the real embedding
+model and vector search, so set MONGO_URI to a reachable cluster, or expect the
+sentiment stage to measure the failure path. The SEC rate budget is raised to
+--sec-rate-limit and kept in a temporary file, so e2e numbers measure the
+pipeline rather than the pacing.
+
+Results are written to benchmarks/results/<timestamp>.json as a flat metric map.
+--compare flags any metric that regressed by more than --threshold and exits 1.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from . import fixtures
+from .fake_server import FakeEdgarServer
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_FIXTURES = os.path.join(HERE, "fixtures", "synthetic")
+DEFAULT_RESULTS = os.path.join(HERE, "results")
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    k = (len(ordered) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def _summary(prefix, seconds):
+    ms = [s * 1000 for s in seconds]
+    return {
+        f"{prefix}.n": len(ms),
+        f"{prefix}.mean_ms": statistics.fmean(ms) if ms else 0.0,
+        f"{prefix}.p50_ms": _percentile(ms, 50),
+        f"{prefix}.p95_ms": _percentile(ms, 95),
+        f"{prefix}.p99_ms": _percentile(ms, 99),
+    }
+
+
+def _files(root, suffixes):
+    for dirpath, _, names in os.walk(root):
+        for name in sorted(names):
+            if name.endswith(suffixes):
+                yield os.path.join(dirpath, name)
+
+
+def bench_parse(fixture_dir):
+    from services.form4_parser import find_form4_xml_url, parse_form4_xml
+    from services.sec_parser import extract_narrative
+
+    sec_root = os.path.join(fixture_dir, "sec", "Archives")
+    results = {}
+
+    def measure(name, paths, func):
+        timings = []
+        for path in paths:
+            with open(path, "rb") as f:
+                content = f.read()
+            start = time.perf_counter()
+            func(content)
+            timings.append(time.perf_counter() - start)
+        results.update(_summary(f"parse.{name}", timings))
+
+    measure("form4_index", _files(sec_root, ("index.html",)),
+            lambda c: find_form4_xml_url(c.decode("utf-8", "replace"), 320193, "0000000000"))
+    measure("form4_xml", _files(sec_root, (".xml",)), lambda c: parse_form4_xml(c.decode("utf-8", "replace")))
+    measure("8k_narrative", _files(sec_root, (".htm",)), extract_narrative)
+    return results
+
+
+def bench_scoring(n_trades=20000, seed=7):
+    from services.integrity_score import MarketModel, integrity_score
+
+    rng = random.Random(seed)
+    start_day = datetime(2024, 1, 2)
+    days = [start_day + timedelta(days=i) for i in range(365)]
+    price = 100.0
+    prices = []
+    for day in days:
+        price *= 1 + rng.gauss(0, 0.02)
+        prices.append((day, price))
+    events = [
+        {"date": rng.choice(days), "sentiment": rng.choice(["positive", "negative", "neutral"]),
+         "confidence": rng.random()}
+        for _ in range(24)
+    ]
+    trades = [
+        {"type": rng.choice(["buy", "sell"]), "shares": rng.randint(100, 100000),
+         "insider_holdings": rng.randint(100000, 5000000), "date": rng.choice(days)}
+        for _ in range(n_trades)
+    ]
+
+    index_rng = random.Random(seed + 1)
+    level, benchmark = 400.0, {}
+    for day in days:
+        level *= 1 + index_rng.gauss(0, 0.01)
+        benchmark[day] = level
+
+    start = time.perf_counter()
+    for trade in trades:
+        integrity_score(trade, prices, events)
+    elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    market = MarketModel(prices, benchmark)
+    for trade in trades:
+        integrity_score(trade, prices, events, market)
+    market_elapsed = time.perf_counter() - start
+    return {
+        "scoring.trades": n_trades,
+        "scoring.trades_per_s": n_trades / elapsed,
+        "scoring.market_model_trades_per_s": n_trades / market_elapsed,
+    }
+
+
+def _large_payload(n_insiders=60, trades_per_insider=120, seed=5):
+    """A /getInfo payload the size of a heavily traded large-cap issuer."""
+    rng = random.Random(seed)
+    start_day = datetime(2024, 10, 1)
+    insiders = []
+    for i in range(n_insiders):
+        trades = []
+        for _ in range(trades_per_insider):
+            derivative = rng.random() < 0.3
+            trade = {
+                "security": "Restricted Stock Unit" if derivative else "Common Stock",
+                "date": (start_day + timedelta(days=rng.randint(0, 364))).strftime("%Y-%m-%d"),
+                "transaction_code": rng.choice(["S", "M", "F", "A", "P"]),
+                "shares": float(rng.randint(100, 200000)),
+                "price_per_share": round(rng.uniform(50, 400), 4) if rng.random() < 0.8 else None,
+                "acquired_disposed": rng.choice(["A", "D"]),
+                "shares_owned_after": float(rng.randint(10000, 5000000)),
+                "transaction_type": "derivative" if derivative else "non-derivative",
+            }
+            if derivative:
+                trade.update(exercise_price=None, underlying_shares=trade["shares"])
+            trades.append(trade)
+        insiders.append({"name": f"Insider {i}", "cik": f"{9000000 + i:010d}",
+                         "roles": ["Director"], "trades": trades})
+    prices = [{"date": (start_day + timedelta(days=d)).strftime("%Y-%m-%d"), "price": round(rng.uniform(150, 250), 2)}
+              for d in range(252)]
+    sentiment = [{"vector_prediction": {"vector_prediction": {"impact": "NEUTRAL", "confidence": "Low"},
+                                        "summary": "Item 8.01 Other Events. " * 20},
+                  "filing_date": prices[d * 20]["date"], "url": f"https://www.sec.gov/Archives/{d}.htm"}
+                 for d in range(10)]
+    return {"success": True, "cik": "320193", "padded_cik": "0000320193", "total_insiders": n_insiders,
+            "insiders": insiders, "stock_data": prices, "ticker": "AAPL", "sentiment": sentiment}
+
+
+def bench_serialize(repeats=20):
+    from services import encoding
+
+    payload = _large_payload()
+    results = {}
+
+    def timed(name, func):
+        func()
+        start = time.perf_counter()
+        for _ in range(repeats):
+            out = func()
+        results[f"serialize.{name}_ms"] = (time.perf_counter() - start) / repeats * 1000
+        return out
+
+    timed("stdlib_json", lambda: json.dumps(payload, sort_keys=True).encode("utf-8"))
+    rows = timed("orjson", lambda: encoding.dumps(payload))
+    columnar = timed("orjson_columnar", lambda: encoding.dumps(encoding.columnar(payload)))
+    for shape, body in (("rows", rows), ("columnar", columnar)):
+        results[f"serialize.{shape}.identity_bytes"] = len(body)
+        for enc in ["gzip"] + (["br"] if encoding.brotli else []):
+            compressed = timed(f"{shape}.{enc}", lambda: encoding._compress(body, enc))
+            results[f"serialize.{shape}.{enc}_bytes"] = len(compressed)
+    return results
+
+
+def _serve_app():
+    from werkzeug.serving import make_server
+    from app import app
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def bench_e2e(ciks, concurrency_levels, requests_per_level):
+    import requests
+
+    server, base = _serve_app()
+    session_local = threading.local()
+
+    def get_info(cik):
+        session = getattr(session_local, "session", None)
+        if session is None:
+            session = session_local.session = requests.Session()
+        start = time.perf_counter()
+        resp = session.get(f"{base}/getInfo/{cik}", timeout=600)
+        return time.perf_counter() - start, resp.status_code, len(resp.content)
+
+    results = {}
+    try:
+        for cik in ciks:
+            elapsed, status, size = get_info(cik)
+            results[f"e2e.cold.{cik}.latency_ms"] = elapsed * 1000
+            results[f"e2e.cold.{cik}.bytes"] = size
+            if status != 200:
+                print(f"  /getInfo/{cik} returned {status}")
+
+        for level in concurrency_levels:
+            order = [ciks[i % len(ciks)] for i in range(requests_per_level)]
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=level) as pool:
+                outcomes = list(pool.map(get_info, order))
+            wall = time.perf_counter() - start
+            results.update(_summary(f"e2e.c{level}", [o[0] for o in outcomes]))
+            results[f"e2e.c{level}.throughput_rps"] = len(outcomes) / wall
+            results[f"e2e.c{level}.errors"] = sum(1 for o in outcomes if o[1] != 200)
+    finally:
+        server.shutdown()
+    return results
+
+
+def _higher_is_better(metric):
+    return metric.endswith(("_rps", "_per_s"))
+
+
+def compare(current, baseline_path, threshold):
+    """Print metric deltas against a baseline run; return True if any regressed beyond threshold."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)["metrics"]
+
+    regressed = False
+    print(f"\nComparison against {baseline_path} (threshold {threshold:.0%})")
+    for metric in sorted(set(current) & set(baseline)):
+        if not metric.endswith(("_ms", "_bytes", "_rps", "_per_s")):
+            continue
+        old, new = baseline[metric], current[metric]
+        if not old:
+            continue
+        change = (new - old) / old
+        worse = -change if _higher_is_better(metric) else change
+        flag = ""
+        if worse > threshold:
+            flag = "  REGRESSION"
+            regressed = True
+        print(f"  {metric:45s} {old:12.2f} -> {new:12.2f} ({change:+.1%}){flag}")
+    return regressed
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, text=True).strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES)
+    parser.add_argument("--suites", default="parse,scoring,serialize,e2e")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--sec-rate-limit", type=int, default=10000,
+                        help="SEC_RATE_LIMIT for the run; pass 8 to include the production pacing")
+    parser.add_argument("--concurrency", default="1,4,16")
+    parser.add_argument("--requests", type=int, default=24, help="requests per concurrency level")
+    parser.add_argument("--out", default=DEFAULT_RESULTS)
+    parser.add_argument("--compare", help="baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    suites = set(args.suites.split(","))
+    if not os.path.isdir(args.fixtures):
+        fixtures.generate(args.fixtures)
+    ciks = sorted(int(name[3:13]) for name in os.listdir(os.path.join(args.fixtures, "sec", "submissions")))
+
+    fake = FakeEdgarServer(args.fixtures, args.latency_ms, args.jitter_ms, args.rate_429).start()
+    # Module-level settings read these at import, so set them before importing the app
+    os.environ["SEC_BASE_URL"] = fake.url
+    os.environ["PRICE_SOURCE_URL"] = fake.url
+    # The fake server has no rate limit to respect, and the host-wide budget file belongs to real workers
+    os.environ["SEC_RATE_LIMIT"] = str(args.sec_rate_limit)
+    os.environ["SEC_RATE_DB"] = os.path.join(tempfile.mkdtemp(), "bench_rate.sqlite")
+    os.environ["GETINFO_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(), "bench_cache.sqlite3")
+    os.environ["GETINFO_CACHE_TTL"] = "0"
+    os.environ["GETINFO_CACHE_STALE_TTL"] = "0"
+
+    metrics = {}
+    try:
+        if "parse" in suites:
+            print("Running parse benchmarks...")
+            metrics.update(bench_parse(args.fixtures))
+        if "scoring" in suites:
+            print("Running scoring benchmarks...")
+            metrics.update(bench_scoring())
+        if "serialize" in suites:
+            print("Running serialization benchmarks...")
+            metrics.update(bench_serialize())
+        if "e2e" in suites:
+            print("Running end-to-end benchmarks...")
+            levels = [int(c) for c in args.concurrency.split(",")]
+            metrics.update(bench_e2e(ciks, levels, args.requests))
+    finally:
+        fake.stop()
+    metrics["fake_server.rate_limited"] = fake.stats["rate_limited"]
+
+    for name, value in metrics.items():
+        print(f"  {name:45s} {value:12.2f}")
+
+    os.makedirs(args.out, exist_ok=True)
+    out_path = os.path.join(args.out, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    with open(out_path, "w") as f:
+        json.dump({
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "config": vars(args),
+            "metrics": metrics,
+        }, f, indent=2)
+    print(f"Saved results to {out_path}")
+
+    if args.compare and compare(metrics, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 from flask import Blueprint, jsonify
 import json
 import os
+from functools import lru_cache
 #create a Blueprint (name, import_name)
 autofill_bp = Blueprint('autofill', __name__)
 
@@ -23,6 +24,24 @@ def get_stock_tickers():
 
     return data
 
+@lru_cache(maxsize=1)
+def get_ticker_index():
+    """(by_cik, by_ticker) lookups over company_tickers.json, built once per process."""
+    by_cik, by_ticker = {}, {}
+    for entry in get_stock_tickers().values():
+        # Keep the first entry per CIK, matching the old linear scan
+        by_cik.setdefault(entry["cik_str"], entry)
+        by_ticker.setdefault(entry["ticker"].upper(), entry)
+    return by_cik, by_ticker
+
+def resolve_company(identifier):
+    """Look up a company by CIK (digits, optionally zero-padded) or ticker. Returns the entry or None."""
+    by_cik, by_ticker = get_ticker_index()
+    identifier = str(identifier).strip()
+    if identifier.isdigit():
+        return by_cik.get(int(identifier))
+    return by_ticker.get(identifier.upper())
+
 @autofill_bp.route('/autofill')
 def autofill():
     data = get_stock_tickers()
@@ -0,0 +1,49 @@
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from routes.autofill import resolve_company
+from services.export import EXPORT_MAX_COMPANIES, FORMATS, SCHEMAS, stream
+from services.scoring import parse_date
+
+# create a Blueprint (name, import_name)
+export_bp = Blueprint('export', __name__)
+
+
+@export_bp.route('/export')
+def export():
+    """
+    Bulk export as Parquet or Arrow IPC stream, e.g.
+    /export?companies=AAPL,MSFT&table=trades&format=parquet&start=2025-01-01&end=2025-06-30
+    """
+    table = request.args.get('table', 'trades')
+    fmt = request.args.get('format', 'parquet')
+    companies = [c for c in request.args.get('companies', '').split(',') if c.strip()]
+    if table not in SCHEMAS:
+        return jsonify({"success": False, "error": f"table must be one of {', '.join(SCHEMAS)}"}), 400
+    if fmt not in FORMATS:
+        return jsonify({"success": False, "error": f"format must be one of {', '.join(FORMATS)}"}), 400
+    if not companies:
+        return jsonify({"success": False, "error": "companies must list at least one CIK or ticker"}), 400
+    if len(companies) > EXPORT_MAX_COMPANIES:
+        return jsonify({"success": False, "error": f"At most {EXPORT_MAX_COMPANIES} companies per export"}), 400
+
+    dates = {}
+    for name in ('start', 'end'):
+        value = request.args.get(name)
+        dates[name] = parse_date(value) if value else None
+        if value and dates[name] is None:
+            return jsonify({"success": False, "error": f"{name} must be YYYY-MM-DD"}), 400
+
+    ciks, unknown = [], []
+    for query in companies:
+        entry = resolve_company(query)
+        if entry is None:
+            unknown.append(query)
+        elif entry["cik_str"] not in ciks:
+            ciks.append(entry["cik_str"])
+    if unknown:
+        return jsonify({"success": False, "error": "Unknown CIK or ticker", "unknown": unknown}), 404
+
+    mimetype, extension = FORMATS[fmt]
+    body = stream(table, ciks, dates['start'], dates['end'], fmt)
+    return Response(stream_with_context(body), mimetype=mimetype, headers={
+        "Content-Disposition": f'attachment; filename="veritas-{table}.{extension}"',
+    })
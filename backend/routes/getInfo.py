@@ -1,34 +1,40 @@
 from services.sec_for_gemini import getSentiment
-from flask import Blueprint, jsonify
+from flask import Blueprint, current_app, jsonify, request
 import requests
-from bs4 import BeautifulSoup
 import sys
 import os
+import threading
+import time
 
 # Add the services directory to the path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'services'))
 from services.stockPrice import get_stock_data
-from routes.autofill import get_stock_tickers
+from routes.autofill import get_ticker_index
+from services.response_cache import CacheEntry, make_etag, response_cache
+from services.encoding import dumps, representation
+from services.metrics import CACHE_REQUESTS, span
+from services.sec_client import sec_get
+from services.form4_parser import find_form4_xml_url, parse_form4_xml, merge_owners, owner_list
 
 # create a Blueprint (name, import_name)
 getInfo_bp = Blueprint('getInfo', __name__)
 
 def get_company_by_cik(cik: int):
-    data = get_stock_tickers()
-
-    for entry in data.values():
-        if entry["cik_str"] == cik:
-            return entry["ticker"], entry["title"]
+    by_cik, _ = get_ticker_index()
+    entry = by_cik.get(cik)
+    if entry:
+        return entry["ticker"], entry["title"]
     return None, None
 
-def get_company(cik):
+def fetch_submissions(cik):
+    """Fetch the SEC submissions JSON for a zero-padded CIK, raising on HTTP errors."""
     HEADERS = {"User-Agent": "Your Name your.email@example.com"}
     url = f"https://data.sec.gov/submissions/CIK{cik}.json"
     
     try:
-        resp = requests.get(url, headers=HEADERS)
+        resp = sec_get(url, headers=HEADERS, stage="sec_submissions")
         resp.raise_for_status()  # This will raise an exception for 4xx and 5xx status codes
-        data = resp.json()
+        return resp.json()
     except requests.exceptions.HTTPError as e:
         if e.response.status_code == 429:
             print(f"Rate limit hit while fetching company submissions for CIK {cik}: {e}")
@@ -39,6 +45,15 @@ def get_company(cik):
     except requests.exceptions.RequestException as e:
         print(f"Error fetching company submissions for CIK {cik}: {e}")
         raise e
+
+def get_company(cik, data=None):
+    """
+    Build the insider list from the company's most recent Form 4 filings.
+    Pass an already-fetched submissions document as data to skip that request.
+    """
+    HEADERS = {"User-Agent": "Your Name your.email@example.com"}
+    if data is None:
+        data = fetch_submissions(cik)
     
     form4_filings = []
     for filing, form in zip(data["filings"]["recent"]["accessionNumber"], 
@@ -55,7 +70,7 @@ def get_company(cik):
         
         # Try to fetch the filing directory listing first (index) and find XML link
         try:
-            file_resp = requests.get(f"https://www.sec.gov/Archives/edgar/data/{int(cik)}/{accession}/", headers=HEADERS, timeout=10)
+            file_resp = sec_get(f"https://www.sec.gov/Archives/edgar/data/{int(cik)}/{accession}/", headers=HEADERS, timeout=10)
             file_resp.raise_for_status()
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 429:
@@ -68,36 +83,13 @@ def get_company(cik):
             print(f"Error fetching filing directory for {f}: {e}")
             continue
 
-        file_soup = BeautifulSoup(file_resp.text, 'html.parser')
-        # look for .xml link
-        xml_link_tag = file_soup.find('a', href=lambda href: href and href.endswith('.xml'))
-        if not xml_link_tag:
-            # sometimes the index page lists files differently; fallback to searching for files with .xml in text
-            links = file_soup.find_all('a')
-            xml_href = None
-            for tag in links:
-                href = tag.get('href', '')
-                if '.xml' in href:
-                    xml_href = href
-                    break
-            if xml_href:
-                xml_file_url = xml_href
-            else:
-                print(f"No XML file link found for filing {f}")
-                continue
-        else:
-            xml_file_url = xml_link_tag['href']
-
-        # Ensure full URL
-        if xml_file_url.startswith('/'):
-            xml_full_url = f"https://www.sec.gov{xml_file_url}"
-        elif xml_file_url.startswith('http'):
-            xml_full_url = xml_file_url
-        else:
-            xml_full_url = f"https://www.sec.gov/Archives/edgar/data/{int(cik)}/{accession}/{xml_file_url}"
+        with span("form4_parse"):
+            xml_full_url = find_form4_xml_url(file_resp.text, cik, accession)
+        if xml_full_url is None:
+            continue
 
         try:
-            xml_resp = requests.get(xml_full_url, headers=HEADERS, timeout=10)
+            xml_resp = sec_get(xml_full_url, headers=HEADERS, timeout=10)
             xml_resp.raise_for_status()
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 429:
@@ -110,215 +102,157 @@ def get_company(cik):
             print(f"Error fetching XML file for {f}: {e}")
             continue
 
-        xml_soup = BeautifulSoup(xml_resp.text, 'xml')
-
-        # Extract transactions from both tables
-        transactions = []
-        
-        # Process non-derivative transactions
-        non_deriv_transactions = xml_soup.find_all('nonDerivativeTransaction')
-        for trans in non_deriv_transactions:
-            trade = {}
-            
-            # Security title
-            security_title = trans.find('securityTitle')
-            trade['security'] = security_title.find('value').text if security_title and security_title.find('value') else 'N/A'
-            
-            # Transaction date
-            trans_date = trans.find('transactionDate')
-            trade['date'] = trans_date.find('value').text if trans_date and trans_date.find('value') else 'N/A'
-            
-            # Transaction code (M=Exercise, F=Tax withholding, S=Sale, etc.)
-            trans_coding = trans.find('transactionCoding')
-            if trans_coding:
-                trade['transaction_code'] = trans_coding.find('transactionCode').text if trans_coding.find('transactionCode') else 'N/A'
-            else:
-                trade['transaction_code'] = 'N/A'
-            
-            # Transaction amounts
-            trans_amounts = trans.find('transactionAmounts')
-            if trans_amounts:
-                shares = trans_amounts.find('transactionShares')
-                trade['shares'] = float(shares.find('value').text) if shares and shares.find('value') else 0
-                
-                price = trans_amounts.find('transactionPricePerShare')
-                if price and price.find('value'):
-                    trade['price_per_share'] = float(price.find('value').text)
-                else:
-                    trade['price_per_share'] = None  # Could be exercise/grant with no price
-                
-                acq_disp = trans_amounts.find('transactionAcquiredDisposedCode')
-                trade['acquired_disposed'] = acq_disp.find('value').text if acq_disp and acq_disp.find('value') else 'N/A'
-            
-            # Post-transaction amounts
-            post_trans = trans.find('postTransactionAmounts')
-            if post_trans:
-                shares_owned = post_trans.find('sharesOwnedFollowingTransaction')
-                trade['shares_owned_after'] = float(shares_owned.find('value').text) if shares_owned and shares_owned.find('value') else 0
-            
-            trade['transaction_type'] = 'non-derivative'
-            transactions.append(trade)
-        
-        # Process derivative transactions (options, RSUs, etc.)
-        deriv_transactions = xml_soup.find_all('derivativeTransaction')
-        for trans in deriv_transactions:
-            trade = {}
-            
-            # Security title
-            security_title = trans.find('securityTitle')
-            trade['security'] = security_title.find('value').text if security_title and security_title.find('value') else 'N/A'
-            
-            # Transaction date
-            trans_date = trans.find('transactionDate')
-            trade['date'] = trans_date.find('value').text if trans_date and trans_date.find('value') else 'N/A'
-            
-            # Transaction code
-            trans_coding = trans.find('transactionCoding')
-            if trans_coding:
-                trade['transaction_code'] = trans_coding.find('transactionCode').text if trans_coding.find('transactionCode') else 'N/A'
-            else:
-                trade['transaction_code'] = 'N/A'
-            
-            # Transaction amounts
-            trans_amounts = trans.find('transactionAmounts')
-            if trans_amounts:
-                shares = trans_amounts.find('transactionShares')
-                trade['shares'] = float(shares.find('value').text) if shares and shares.find('value') else 0
-                
-                price = trans_amounts.find('transactionPricePerShare')
-                if price and price.find('value'):
-                    trade['price_per_share'] = float(price.find('value').text)
-                else:
-                    trade['price_per_share'] = None
-                
-                acq_disp = trans_amounts.find('transactionAcquiredDisposedCode')
-                trade['acquired_disposed'] = acq_disp.find('value').text if acq_disp and acq_disp.find('value') else 'N/A'
-            
-            # Conversion/Exercise price
-            conv_price = trans.find('conversionOrExercisePrice')
-            if conv_price and conv_price.find('value'):
-                trade['exercise_price'] = float(conv_price.find('value').text)
-            else:
-                trade['exercise_price'] = None
-            
-            # Underlying security
-            underlying = trans.find('underlyingSecurity')
-            if underlying:
-                underlying_shares = underlying.find('underlyingSecurityShares')
-                trade['underlying_shares'] = float(underlying_shares.find('value').text) if underlying_shares and underlying_shares.find('value') else 0
-            
-            # Post-transaction amounts
-            post_trans = trans.find('postTransactionAmounts')
-            if post_trans:
-                shares_owned = post_trans.find('sharesOwnedFollowingTransaction')
-                trade['shares_owned_after'] = float(shares_owned.find('value').text) if shares_owned and shares_owned.find('value') else 0
-            
-            trade['transaction_type'] = 'derivative'
-            transactions.append(trade)
-
-        # There can be multiple reportingOwner entries
-        rptOwners = xml_soup.find_all('reportingOwner')
-        if not rptOwners:
+        with span("form4_parse"):
+            transactions, owners = parse_form4_xml(xml_resp.text)
+        if not owners:
             print(f"No reportingOwner entries found in XML for {f}")
             continue
 
-        for ro in rptOwners:
-            name_tag = ro.find('rptOwnerName')
-            owner_name = name_tag.text.strip() if name_tag else 'N/A'
-            owner_cik_tag = ro.find('rptOwnerCik')
-            owner_cik = owner_cik_tag.text.strip() if owner_cik_tag else 'N/A'
+        merge_owners(owner_info, owners, transactions)
 
-            # Get relationship information
-            rel = ro.find('reportingOwnerRelationship')
-            roles = []
-            
-            if rel:
-                isDirector = rel.find('isDirector').text if rel.find('isDirector') else '0'
-                isOfficer = rel.find('isOfficer').text if rel.find('isOfficer') else '0'
-                officerTitle = rel.find('officerTitle').text if rel.find('officerTitle') else ''
-                isTenPercentOwner = rel.find('isTenPercentOwner').text if rel.find('isTenPercentOwner') else '0'
-                isOther = rel.find('isOther').text if rel.find('isOther') else '0'
-
-                if isDirector == '1':
-                    roles.append('Director')
-                if isOfficer == '1':
-                    roles.append(officerTitle or 'Officer')
-                if isTenPercentOwner == '1':
-                    roles.append('10% Owner')
-                if isOther == '1':
-                    roles.append('Other')
-
-            # Update owner_info dictionary
-            if owner_cik not in owner_info:
-                owner_info[owner_cik] = {
-                    'name': owner_name,
-                    'cik': owner_cik,
-                    'roles': set(roles),
-                    'trades': transactions.copy()  # Copy transactions for this filing
-                }
-            else:
-                # Update roles if new ones found
-                owner_info[owner_cik]['roles'].update(roles)
-                # Append new transactions
-                owner_info[owner_cik]['trades'].extend(transactions.copy())
-    
-    # Convert sets to lists in the owner_info dictionary
-    for owner_cik, info in owner_info.items():
-        info['roles'] = list(info['roles'])
-    
-    # Convert the dictionary values to a list
-    owner_info_list = list(owner_info.values())
+    return owner_list(owner_info)
 
-    return owner_info_list
 
+def format_stock_data(stock_data_raw):
+    """Transform get_stock_data records into the {'date', 'price'} points the frontend plots."""
+    formatted_stock_data = []
+    for entry in stock_data_raw:
+        if entry and 'Close' in entry:
+            # Convert timestamp to date string if needed
+            date_str = entry.get('Date', entry.get('Datetime', ''))
+            if hasattr(date_str, 'strftime'):
+                date_str = date_str.strftime('%Y-%m-%d')
 
-@getInfo_bp.route('/getInfo/<string:CIK>')
-def getInfo(CIK):
-    try:
-        # Pad the CIK with leading zeros to ensure it's 10 digits
-        # SEC expects CIKs to be 10 digits with leading zeros
-        padded_cik = CIK.zfill(10)
-        
-        # Call the get_company function to fetch insider trading data
+            formatted_stock_data.append({
+                'date': str(date_str),
+                'price': round(float(entry['Close']), 2),
+            })
+    return formatted_stock_data
+
+
+def company_payload(CIK, owner_data, ticker, formatted_stock_data, sentiment):
+    """Assemble the /getInfo response body from the pipeline results."""
+    return {
+        "success": True,
+        "cik": CIK,
+        "padded_cik": CIK.zfill(10),
+        "total_insiders": len(owner_data),
+        "insiders": owner_data,
+        "stock_data": formatted_stock_data,
+        "ticker": ticker,
+        "sentiment": sentiment,
+    }
+
+
+def build_company_payload(CIK):
+    """
+    Run the full lookup pipeline for a CIK and return the /getInfo payload.
+    Errors propagate so callers can map them to HTTP responses.
+    """
+    # Pad the CIK with leading zeros to ensure it's 10 digits
+    # SEC expects CIKs to be 10 digits with leading zeros
+    padded_cik = CIK.zfill(10)
+
+    # Call the get_company function to fetch insider trading data
+    with span("form4"):
         owner_data = get_company(padded_cik)
-        
-        # Get stock data using the existing stock data function
-        # For now, always use AAPL ticker
-        ticker, _ = get_company_by_cik(int(CIK))
-        print(ticker)
 
-        # Get 1 year of stock data
+    # Get stock data using the existing stock data function
+    ticker, _ = get_company_by_cik(int(CIK))
+
+    # Get 1 year of stock data
+    with span("yfinance"):
         stock_data_raw = get_stock_data(ticker, period="1y", interval="1d")
-        
-        # Transform data for frontend consumption
-        formatted_stock_data = []
-        for entry in stock_data_raw:
-            if entry and 'Close' in entry:
-                # Convert timestamp to date string if needed
-                date_str = entry.get('Date', entry.get('Datetime', ''))
-                if hasattr(date_str, 'strftime'):
-                    date_str = date_str.strftime('%Y-%m-%d')
-                
-                formatted_stock_data.append({
-                    'date': str(date_str),
-                    'price': round(float(entry['Close']), 2),
-                })
-
-        # Calculate the sentiment
+
+    # Calculate the sentiment
+    with span("sentiment"):
         sentiment = getSentiment(int(CIK))
-        print("Sentiment:", sentiment)
-        
-        # Return the combined data as JSON
-        return jsonify({
-            "success": True,
-            "cik": CIK,
-            "padded_cik": padded_cik,
-            "total_insiders": len(owner_data),
-            "insiders": owner_data,
-            "stock_data": formatted_stock_data,
-            "ticker": ticker,
-            "sentiment": sentiment,
-        })
+
+    return company_payload(CIK, owner_data, ticker, format_stock_data(stock_data_raw), sentiment)
+
+
+def normalize_cik(CIK):
+    """'0000320193' and '320193' name the same company; numeric CIKs are reduced to the unpadded form."""
+    CIK = str(CIK).strip()
+    return str(int(CIK)) if CIK.isdigit() else CIK
+
+
+def cache_key(CIK):
+    # One entry per company however the CIK was padded; the cached payload echoes the normalized CIK
+    return f"getInfo:{normalize_cik(CIK)}"
+
+
+def cacheable(payload):
+    # getSentiment returns None when any of its stages failed (SEC, model, Mongo); that is
+    # transient and must not be replayed for the TTL plus the stale window
+    return payload.get("sentiment") is not None
+
+
+def store_payload(CIK, payload):
+    """
+    Cache a freshly built payload and return its entry. A payload that is not
+    cacheable gets an entry that is served once but never stored, so an
+    existing good entry is kept and the next request tries again.
+    """
+    body = dumps(payload)
+    if not cacheable(payload):
+        return CacheEntry(body, make_etag(body), time.time())
+    return response_cache.set(cache_key(CIK), body)
+
+
+def _refresh_in_background(app, CIK):
+    """Rebuild a stale entry; the claim is released whether or not it succeeds."""
+    with app.app_context():
+        try:
+            store_payload(CIK, build_company_payload(CIK))
+        except Exception as e:
+            print(f"Background refresh failed for CIK {CIK}: {e}")
+        finally:
+            response_cache.release_refresh(cache_key(CIK))
+
+
+def cache_control(cache_status):
+    if cache_status == "BYPASS":
+        return "no-store"
+    return f"public, max-age={response_cache.ttl}, stale-while-revalidate={response_cache.stale_ttl}"
+
+
+def _cached_response(entry, cache_status):
+    body, etag, encoding = representation(
+        entry.body, entry.etag, request.args.get("shape"), request.headers.get("Accept-Encoding")
+    )
+    response = current_app.response_class(body, mimetype="application/json")
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = cache_control(cache_status)
+    response.headers["X-Cache"] = cache_status
+    # Turns the response into a 304 when If-None-Match matches the ETag
+    return response.make_conditional(request)
+
+
+@getInfo_bp.route('/getInfo/<string:CIK>')
+def getInfo(CIK):
+    CIK = normalize_cik(CIK)
+    with span("cache_lookup"):
+        entry = response_cache.get(cache_key(CIK))
+    if entry is not None:
+        if response_cache.is_fresh(entry):
+            CACHE_REQUESTS.inc(cache="getinfo", result="hit")
+            return _cached_response(entry, "HIT")
+        # Serve the last good payload now and let one worker refresh it
+        CACHE_REQUESTS.inc(cache="getinfo", result="stale")
+        if response_cache.claim_refresh(cache_key(CIK)):
+            app = current_app._get_current_object()
+            threading.Thread(target=_refresh_in_background, args=(app, CIK), daemon=True).start()
+        return _cached_response(entry, "STALE")
+
+    CACHE_REQUESTS.inc(cache="getinfo", result="miss")
+    try:
+        payload = build_company_payload(CIK)
+        entry = store_payload(CIK, payload)
+        return _cached_response(entry, "MISS" if cacheable(payload) else "BYPASS")
     
     except requests.exceptions.HTTPError as e:
         # Check if it's a rate limit error from SEC
@@ -0,0 +1,25 @@
+from flask import Blueprint, jsonify, request
+from services.leaderboard import LEADERBOARD_K, init_tables, latest_leaderboard
+
+# create a Blueprint (name, import_name)
+leaderboard_bp = Blueprint('leaderboard', __name__)
+
+# Tables are created once here, not on every request
+init_tables()
+
+
+@leaderboard_bp.route('/leaderboard')
+def leaderboard():
+    """
+    Most suspicious trades from the latest ranking run. The ranking covers the
+    issuers in the response cache (those looked up, screened or populated with
+    python -m services.leaderboard --populate), not every listed company.
+    """
+    limit = request.args.get('limit', LEADERBOARD_K, type=int)
+    board = latest_leaderboard(limit=max(1, limit))
+    if board is None:
+        return jsonify({
+            "success": False,
+            "error": "No leaderboard yet. Run python -m services.leaderboard to build one."
+        }), 404
+    return jsonify({"success": True, **board})
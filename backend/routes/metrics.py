@@ -0,0 +1,32 @@
+from flask import Blueprint, Response, request
+from services.metrics import render, server_timing_header, start_request_timing
+
+# create a Blueprint (name, import_name)
+metrics_bp = Blueprint('metrics', __name__)
+
+
+def timing_requested(args):
+    """Server-Timing is opt-in per request with ?timing=1."""
+    value = args.get('timing')
+    if isinstance(value, list):
+        value = value[-1] if value else None
+    return value in ('1', 'true', 'yes')
+
+
+@metrics_bp.before_app_request
+def begin_request_timing():
+    start_request_timing(timing_requested(request.args))
+
+
+@metrics_bp.after_app_request
+def add_server_timing(response):
+    timing = server_timing_header()
+    if timing:
+        response.headers['Server-Timing'] = timing
+    return response
+
+
+@metrics_bp.route('/metrics')
+def metrics():
+    # Prometheus text exposition format
+    return Response(render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,195 @@
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import os
+import orjson
+import requests
+
+from routes.autofill import resolve_company
+from routes.getInfo import cache_key, company_payload, fetch_submissions, format_stock_data, get_company, store_payload
+from services.encoding import dumps
+from services.metrics import CACHE_REQUESTS, span
+from services.response_cache import response_cache
+from services.scoring import score_company
+from services.sec_for_gemini import analyze_filings, fetch_8k_narratives, search_pool, sentiment_entry
+from services.stockPrice import get_stock_data
+
+# create a Blueprint (name, import_name)
+screen_bp = Blueprint('screen', __name__)
+
+SCREEN_WORKERS = int(os.environ.get("SCREEN_WORKERS", 8))
+SCREEN_MAX_COMPANIES = int(os.environ.get("SCREEN_MAX_COMPANIES", 500))
+# Embed once this many 8-K narratives are waiting (or when all fetches are done)
+SCREEN_EMBED_BATCH = int(os.environ.get("SCREEN_EMBED_BATCH", 64))
+
+# Fetches kept in flight per request, so later requests and the search stage are not queued behind a whole batch
+SCREEN_INFLIGHT = int(os.environ.get("SCREEN_INFLIGHT", SCREEN_WORKERS * 2))
+
+# Shared by all screening requests; SEC pacing is enforced underneath by the shared rate budget.
+# Vector searches run on sec_for_gemini.search_pool, so a finished batch never waits behind queued fetches
+screen_pool = ThreadPoolExecutor(max_workers=SCREEN_WORKERS, thread_name_prefix="screen")
+
+
+def gather_company(entry):
+    """
+    I/O stage for one company: one submissions fetch shared by the Form 4 and
+    8-K lookups, plus a year of prices. Embedding is left to the batch stage.
+    """
+    cik = entry["cik_str"]
+    padded_cik = str(cik).zfill(10)
+    submissions = fetch_submissions(padded_cik)
+    with span("form4"):
+        insiders = get_company(padded_cik, data=submissions)
+    with span("yfinance"):
+        stock_data = format_stock_data(get_stock_data(entry["ticker"], period="1y", interval="1d"))
+    try:
+        narratives = fetch_8k_narratives(cik, submissions=submissions)
+    except Exception as e:
+        # None marks sentiment as failed, so the payload is scored but not cached
+        print(f"Failed to fetch 8-Ks for CIK {cik}: {e}")
+        narratives = None
+    return {"entry": entry, "insiders": insiders, "stock_data": stock_data, "narratives": narratives}
+
+
+def _classify_batch(gathered):
+    """Embed every narrative chunk in the batch in one model call, then run the vector searches on the pool."""
+    jobs = [(g, filing, words) for g in gathered for filing, words in g["narratives"] or []]
+    analyses = analyze_filings([words for _, _, words in jobs], map_fn=search_pool.map)
+    sentiment = {id(g): [] if g["narratives"] is not None else None for g in gathered}
+    for (g, filing, _), analysis in zip(jobs, analyses):
+        sentiment[id(g)].append(sentiment_entry(filing, analysis))
+    return sentiment
+
+
+def _row(entry, payload, top_n):
+    return {
+        "cik": str(entry["cik_str"]),
+        "ticker": entry["ticker"],
+        "name": entry["title"],
+        "total_insiders": payload["total_insiders"],
+        **score_company(payload, top_n=top_n),
+    }
+
+
+def _score_batch(gathered, top_n):
+    sentiment = _classify_batch(gathered)
+    for g in gathered:
+        entry = g["entry"]
+        payload = company_payload(str(entry["cik_str"]), g["insiders"], entry["ticker"], g["stock_data"], sentiment[id(g)])
+        # Screening doubles as a cache warm-up for /getInfo
+        store_payload(str(entry["cik_str"]), payload)
+        yield _row(entry, payload, top_n)
+
+
+def _fresh_payload(entry):
+    """The cached /getInfo payload for entry if it is still fresh, else None."""
+    cached = response_cache.get(cache_key(entry["cik_str"]))
+    if cached is not None and response_cache.is_fresh(cached):
+        CACHE_REQUESTS.inc(cache="screen", result="hit")
+        return orjson.loads(cached.body)
+    CACHE_REQUESTS.inc(cache="screen", result="stale" if cached is not None else "miss")
+    return None
+
+
+def _error_row(query, e):
+    row = {"query": query, "integrity_score": None}
+    if isinstance(e, requests.exceptions.HTTPError) and e.response is not None and e.response.status_code == 429:
+        row.update(error="SEC API rate limit exceeded. Please wait and try again.", error_type="rate_limit")
+    else:
+        row["error"] = str(e)
+    return row
+
+
+def screen_companies(entries, top_n=5):
+    """
+    Screen resolved company entries. Yields one row per company: first those
+    with a fresh cached payload, then the rest as their batch finishes.
+    Fetches run on the shared pool, at most SCREEN_INFLIGHT at a time, and
+    narratives from every company that has finished fetching are embedded
+    together.
+    """
+    # Companies with a fresh /getInfo payload are scored from it; only misses and stale entries are fetched
+    misses = []
+    for entry in entries:
+        payload = _fresh_payload(entry)
+        if payload is None:
+            misses.append(entry)
+        else:
+            yield _row(entry, payload, top_n)
+
+    queued = iter(misses)
+    futures = {}
+
+    def submit_next():
+        entry = next(queued, None)
+        if entry is not None:
+            future = screen_pool.submit(gather_company, entry)
+            futures[future] = entry
+            pending.add(future)
+
+    pending = set()
+    for _ in range(SCREEN_INFLIGHT):
+        submit_next()
+    ready = []
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                ready.append(future.result())
+            except Exception as e:
+                yield _error_row(futures[future]["ticker"], e)
+            del futures[future]
+            submit_next()
+        waiting = sum(len(g["narratives"] or []) for g in ready)
+        if ready and (waiting >= SCREEN_EMBED_BATCH or not pending):
+            yield from _score_batch(ready, top_n)
+            ready = []
+
+
+def rank(rows, top_n=5):
+    """Order companies by integrity (lowest first) and collect the riskiest trades across all of them."""
+    scored = sorted((r for r in rows if r.get("integrity_score") is not None), key=lambda r: r["integrity_score"])
+    unscored = [r for r in rows if r.get("integrity_score") is None]
+    flagged = [
+        {"cik": r["cik"], "ticker": r["ticker"], **trade}
+        for r in scored for trade in r["flagged_trades"]
+    ]
+    flagged.sort(key=lambda t: t["risk"], reverse=True)
+    return {"companies": scored + unscored, "top_flagged_trades": flagged[:top_n]}
+
+
+@screen_bp.route('/screen', methods=['POST'])
+def screen():
+    body = request.get_json(silent=True) or {}
+    companies = body.get("companies")
+    if not isinstance(companies, list) or not companies:
+        return jsonify({"success": False, "error": "Body must include a non-empty 'companies' list of CIKs or tickers"}), 400
+    if len(companies) > SCREEN_MAX_COMPANIES:
+        return jsonify({"success": False, "error": f"At most {SCREEN_MAX_COMPANIES} companies per request"}), 400
+    try:
+        top_n = int(body.get("top_n", 5))
+    except (TypeError, ValueError):
+        top_n = None
+    if top_n is None or top_n < 0:
+        return jsonify({"success": False, "error": "'top_n' must be a non-negative integer"}), 400
+
+    entries, rows, seen = [], [], set()
+    for query in companies:
+        entry = resolve_company(query)
+        if entry is None:
+            rows.append({"query": query, "integrity_score": None, "error": "Unknown CIK or ticker"})
+        elif entry["cik_str"] not in seen:
+            seen.add(entry["cik_str"])
+            entries.append(entry)
+
+    if body.get("stream"):
+        def generate():
+            for row in rows:
+                yield dumps({"type": "company", **row}) + b"\n"
+            for row in screen_companies(entries, top_n):
+                rows.append(row)
+                yield dumps({"type": "company", **row}) + b"\n"
+            yield dumps({"type": "ranking", **rank(rows, top_n)}) + b"\n"
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+    rows.extend(screen_companies(entries, top_n))
+    return jsonify({"success": True, "total_companies": len(rows), **rank(rows, top_n)})
@@ -1,10 +1,12 @@
 import os
+import time
 from datetime import datetime
 from typing import List, Dict, Optional
 from pymongo import MongoClient
 import json
 from dotenv import load_dotenv
 import re
+from .metrics import EMBEDDING_BATCH_SIZE, gauge, span
 load_dotenv()
 try:
     from sentence_transformers import SentenceTransformer
@@ -18,66 +20,139 @@ MONGO_URI = os.environ.get("MONGO_URI")
 DB_NAME = "HackHarvard"
 VECTOR_COLLECTION = "sentiment_vectors" 
 VECTOR_INDEX_NAME = "vector_index_sentiment"
+# Holds the pointer to the labeled-set version serving reads (see sentiment_index.py)
+INDEX_META_COLLECTION = "sentiment_index_meta"
+# Seconds a worker keeps using the active version it last read
+ACTIVE_VERSION_TTL = 30
 EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
 VECTOR_DIMENSIONS = 384
 
+# Embedding inference: "torch" (full precision), "onnx" (ONNX Runtime) or "onnx-int8" (quantized ONNX)
+EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "torch")
+# Intra-op threads for the embedding model; 0 keeps the library default (all cores)
+EMBEDDING_THREADS = int(os.environ.get("EMBEDDING_THREADS", 0))
+# Quantized export shipped in the model repo; use model_qint8_avx512(_vnni)/arm64 instead where the CPU supports it
+EMBEDDING_INT8_FILE = os.environ.get("EMBEDDING_INT8_FILE", "onnx/model_quint8_avx2.onnx")
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+# 1 for the backend actually serving embeddings; differs from requested after a fallback
+EMBEDDING_BACKEND_INFO = gauge("veritas_embedding_backend_info", "Embedding backend in use, by requested and active backend.")
+
+def load_embedding_model(backend: str = EMBEDDING_BACKEND, threads: int = EMBEDDING_THREADS):
+    """Load EMBEDDING_MODEL_NAME on the given backend. The ONNX backends need 'pip install sentence-transformers[onnx]'."""
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown EMBEDDING_BACKEND {backend!r}, expected one of {EMBEDDING_BACKENDS}")
+    if backend == "torch":
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+        return SentenceTransformer(EMBEDDING_MODEL_NAME)
+
+    import onnxruntime
+    options = onnxruntime.SessionOptions()
+    if threads:
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+    model_kwargs = {
+        "session_options": options,
+        "provider": "CPUExecutionProvider",
+        "file_name": EMBEDDING_INT8_FILE if backend == "onnx-int8" else "onnx/model.onnx",
+    }
+    return SentenceTransformer(EMBEDDING_MODEL_NAME, backend="onnx", model_kwargs=model_kwargs)
+
 try:
     if SentenceTransformer:
         # Load model from disk/cache - this is the slow step that happens once
-        model = SentenceTransformer(EMBEDDING_MODEL_NAME)
-        print(f"Local embedding model {EMBEDDING_MODEL_NAME} loaded.")
+        embedding_backend = EMBEDDING_BACKEND
+        try:
+            model = load_embedding_model(embedding_backend)
+        except ImportError as e:
+            print(f"Warning: {embedding_backend} backend unavailable ({e}). Please run 'pip install sentence-transformers[onnx]'. Falling back to torch.")
+            embedding_backend = "torch"
+            model = load_embedding_model(embedding_backend)
+        EMBEDDING_BACKEND_INFO.set(1, requested=EMBEDDING_BACKEND, active=embedding_backend)
+        print(f"Local embedding model {EMBEDDING_MODEL_NAME} loaded ({embedding_backend}).")
     else:
         model = None
+        embedding_backend = None
     mongo_client = MongoClient(MONGO_URI)
     db_collection = mongo_client[DB_NAME][VECTOR_COLLECTION]
+    meta_collection = mongo_client[DB_NAME][INDEX_META_COLLECTION]
     print("MongoDB client initialized successfully.")
 
 except Exception as e:
     print(f"Initialization failed: {e}")
     model = None
+    embedding_backend = None
     mongo_client = None
     db_collection = None
+    meta_collection = None
+
+_active_version = {"version": None, "expires": 0.0}
+
+def active_index_version(refresh: bool = False) -> Optional[int]:
+    """
+    Version of the labeled set that vector search should read, or None for a
+    collection built before versioning (search then runs unfiltered).
+    """
+    if meta_collection is None:
+        return None
+    now = time.monotonic()
+    if not refresh and now < _active_version["expires"]:
+        return _active_version["version"]
+    try:
+        pointer = meta_collection.find_one({"_id": "active"}) or {}
+        _active_version.update(version=pointer.get("version"), expires=now + ACTIVE_VERSION_TTL)
+    except Exception as e:
+        print(f"Error reading active sentiment index version: {e}")
+    return _active_version["version"]
 
 def get_embedding(text: str) -> Optional[List[float]]:
     """Generates a 384-dimensional vector embedding for the input text using SBERT."""
     if not model:
         return None
     try:
-        embedding = model.encode(text).tolist()
+        with span("embedding"):
+            embedding = model.encode(text).tolist()
+        EMBEDDING_BATCH_SIZE.observe(1)
         return embedding
     except Exception as e:
         print(f"Error generating local embedding: {e}")
         return None
 
-def setup_initial_sentiment_vectors():
+def embedding_tokenizer():
+    """The embedding model's tokenizer (for sizing text windows), or None if the model is unavailable."""
+    return getattr(model, "tokenizer", None) if model else None
+
+def embedding_max_tokens() -> int:
+    """Tokens the model reads per text before truncating."""
+    return getattr(model, "max_seq_length", None) or 256
+
+def get_embeddings(texts: List[str], batch_size: int = 64) -> List[Optional[List[float]]]:
     """
-    TRAINS THE MODEL by generating vectors for pre-labeled text snippets and 
-    inserting them into the MongoDB Atlas collection. This should only be run ONCE.
+    Embeds many texts in batched model calls. Returns one vector per input
+    (None for every input if the model is unavailable or encoding fails).
     """
-    if db_collection is None:
-        print("Cannot run setup: MongoDB or local model not initialized.")
-        return
-    
-    db_collection.delete_many({})
-    print(f"Cleared collection and preparing to insert {len(TRAINING_DATA)} training vectors...")
-    
-    documents_to_insert = []
-    for text, impact in TRAINING_DATA:
-        # Generate embedding using the local model
-        embedding = get_embedding(text)
-        if embedding:
-            documents_to_insert.append({
-                "text_snippet": text,
-                "impact": impact,
-                "plot_embedding": embedding, 
-                "timestamp": datetime.utcnow()
-            })
-            
-    if documents_to_insert:
-        db_collection.insert_many(documents_to_insert)
-        print(f"Successfully inserted {len(documents_to_insert)} labeled vectors.")
-    else:
-        print("Failed to generate any embeddings for insertion.")
+    if not model or not texts:
+        return [None] * len(texts)
+    try:
+        with span("embedding"):
+            vectors = model.encode(texts, batch_size=batch_size)
+        EMBEDDING_BATCH_SIZE.observe(len(texts))
+        return [vector.tolist() for vector in vectors]
+    except Exception as e:
+        print(f"Error generating local embeddings: {e}")
+        return [None] * len(texts)
+
+def setup_initial_sentiment_vectors(training_data: List[tuple]):
+    """
+    TRAINS THE MODEL by generating vectors for pre-labeled (text, impact)
+    snippets and publishing them as a new version of the MongoDB Atlas
+    collection. Safe to re-run: only new or changed snippets are embedded.
+    """
+    from .sentiment_index import build_index
+
+    return build_index(training_data)
 
 def predict_impact_vector_search(filing_text: str) -> Dict[str, str]:
     """
@@ -89,23 +164,46 @@ def predict_impact_vector_search(filing_text: str) -> Dict[str, str]:
         return {"impact": "ERROR", "confidence": "None"}
 
     query_vector = get_embedding(filing_text)
-    
+
+    return predict_impact_from_vector(query_vector)
+
+def predict_impact_from_vector(query_vector: Optional[List[float]]) -> Dict[str, str]:
+    """
+    Vector Search classification for an already-embedded text. Chunked filings
+    (sec_for_gemini.analyze_filings) use impact_votes and classify_votes
+    directly so votes can be summed across chunks first.
+    """
+    if db_collection is None:
+        return {"impact": "ERROR", "confidence": "None"}
+
     if not query_vector:
         return {"impact": "NEUTRAL", "confidence": "Low"}
 
-    filing_text = re.sub(r'[^a-zA-Z0-9]', '', filing_text)
+    votes = impact_votes(query_vector)
+    if votes is None:
+        return {"impact": "ERROR", "confidence": "None"}
+    return classify_votes(votes)
 
+def impact_votes(query_vector: List[float]) -> Optional[Dict[str, float]]:
+    """
+    Score-weighted impact votes of the labeled snippets nearest to query_vector.
+    All zeros when nothing matches, None if the search fails.
+    """
+    vote_counts = {"STOCK_UP": 0, "STOCK_DOWN": 0, "NEUTRAL": 0}
     try:
+        vector_search = {
+            "queryVector": query_vector,
+            "path": "plot_embedding",
+            "numCandidates": 100,  # INCREASED from 50 to 150 for better search breadth
+            "limit": 10,           # Increased from 5 to 10 for more votes
+            "index": VECTOR_INDEX_NAME,
+        }
+        version = active_index_version()
+        if version is not None:
+            # Only snippets in the published labeled set vote, even mid-rebuild
+            vector_search["filter"] = {"versions": version}
         pipeline = [
-            {
-                '$vectorSearch': {
-                    "queryVector": query_vector,
-                    "path": "plot_embedding",
-                    "numCandidates": 100,  # INCREASED from 50 to 150 for better search breadth
-                    "limit": 10,           # Increased from 5 to 10 for more votes
-                    "index": VECTOR_INDEX_NAME,
-                }
-            },
+            {'$vectorSearch': vector_search},
             {
                 '$project': {
                     "impact": 1,
@@ -115,36 +213,34 @@ def predict_impact_vector_search(filing_text: str) -> Dict[str, str]:
             }
         ]
         
-        results = list(db_collection.aggregate(pipeline))
-        
-        if not results:
-             return {"impact": "NEUTRAL", "confidence": "Low"}
+        with span("vector_search"):
+            results = list(db_collection.aggregate(pipeline))
 
-        # 3. Aggregate Votes and Determine Confidence
-        vote_counts = {"STOCK_UP": 0, "STOCK_DOWN": 0, "NEUTRAL": 0}
-        total_score_sum = 0
-        
         # Weigh votes by score (cosine similarity score)
         for res in results:
             impact_type = res.get('impact', 'NEUTRAL')
-            score = res.get('score', 0)
-            
             if impact_type in vote_counts:
-                vote_counts[impact_type] += score 
-            total_score_sum += score
-
-        # Determine the winner based on weighted votes
-        most_voted_impact = max(vote_counts, key=vote_counts.get)
-        
-        # Confidence is the winning weighted score divided by the total score
-        confidence_level = vote_counts[most_voted_impact] / total_score_sum
-        
-        # ADJUSTED CONFIDENCE THRESHOLDS (A simple majority is now "High" confidence)
-        confidence = "High" if confidence_level >= 0.60 else "Moderate" if confidence_level >= 0.4 else "Low"
-
-        return {"impact": most_voted_impact, "confidence": confidence}
+                vote_counts[impact_type] += res.get('score', 0)
+        return vote_counts
 
     except Exception as e:
         print(f"MongoDB Vector Search error: {e}")
-        return {"impact": "ERROR", "confidence": "None"}
+        return None
+
+def classify_votes(vote_counts: Dict[str, float]) -> Dict[str, str]:
+    """Turn weighted votes (from one search or summed over many) into an impact and confidence label."""
+    total_score_sum = sum(vote_counts.values())
+    if total_score_sum <= 0:
+        return {"impact": "NEUTRAL", "confidence": "Low"}
+
+    # Determine the winner based on weighted votes
+    most_voted_impact = max(vote_counts, key=vote_counts.get)
+    
+    # Confidence is the winning weighted score divided by the total score
+    confidence_level = vote_counts[most_voted_impact] / total_score_sum
+    
+    # ADJUSTED CONFIDENCE THRESHOLDS (A simple majority is now "High" confidence)
+    confidence = "High" if confidence_level >= 0.60 else "Moderate" if confidence_level >= 0.4 else "Low"
+
+    return {"impact": most_voted_impact, "confidence": confidence}
     
\ No newline at end of file
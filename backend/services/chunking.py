@@ -0,0 +1,106 @@
+"""
+Chunking of long 8-K narratives for embedding.
+
+The embedding model silently truncates its input (256 tokens for
+all-MiniLM-L6-v2), so a whole filing embedded as one string is mostly
+ignored. chunk_filing splits a narrative by 8-K Item, then each Item into
+overlapping token windows that fit the model, and caps the number of chunks
+per filing (taking chunks round-robin across Items, so every Item keeps its
+opening window before any Item gets a second one).
+"""
+
+import os
+import re
+
+# Tokens per window, leaving room for the model's [CLS]/[SEP]
+CHUNK_TOKENS = int(os.environ.get("CHUNK_TOKENS", 240))
+CHUNK_OVERLAP = int(os.environ.get("CHUNK_OVERLAP", 32))
+# Bounds embedding and vector search work per filing
+MAX_CHUNKS_PER_FILING = int(os.environ.get("MAX_CHUNKS_PER_FILING", 16))
+
+# 8-K items (Form 8-K General Instructions B)
+ITEMS = {
+    "1.01", "1.02", "1.03", "1.04", "1.05",
+    "2.01", "2.02", "2.03", "2.04", "2.05", "2.06",
+    "3.01", "3.02", "3.03",
+    "4.01", "4.02",
+    "5.01", "5.02", "5.03", "5.04", "5.05", "5.06", "5.07", "5.08",
+    "6.01", "6.02", "6.03", "6.04", "6.05", "6.06", "6.10",
+    "7.01", "8.01", "9.01",
+}
+# Exhibit lists carry no sentiment; only used when a filing has nothing else
+EXHIBITS_ITEM = "Item 9.01"
+# extract_narrative strips punctuation, so "Item 2.02" arrives as "Item 202"
+ITEM_HEADING = re.compile(r"Item\s*(\d)\.?(\d{2})(?!\d)", re.IGNORECASE)
+
+
+def _is_heading(text, match):
+    """
+    A heading is a known Item that starts the narrative or a line, i.e. a block
+    element of the filing; anything else ("as described in Item 502 Departure
+    of Directors") is a cross-reference and stays in the body.
+    """
+    if f"{match.group(1)}.{match.group(2)}" not in ITEMS:
+        return False
+    line_start = text.rfind("\n", 0, match.start()) + 1
+    return not text[line_start:match.start()].strip()
+
+
+def split_items(narrative):
+    """
+    Split an extract_narrative string (one line per block element) into
+    [(item, text)] in document order. The narrative starts just after its
+    first 'Item', so that word is put back.
+    Repeated headings of the same Item are merged.
+    """
+    text = "Item " + narrative
+    headings = [m for m in ITEM_HEADING.finditer(text) if _is_heading(text, m)]
+    if not headings:
+        return [("Filing", narrative.strip())] if narrative.strip() else []
+
+    sections = {}
+    for i, match in enumerate(headings):
+        end = headings[i + 1].start() if i + 1 < len(headings) else len(text)
+        body = text[match.end():end].strip()
+        if body:
+            item = f"Item {match.group(1)}.{match.group(2)}"
+            sections[item] = f"{sections[item]} {body}" if item in sections else body
+    if len(sections) > 1:
+        sections.pop(EXHIBITS_ITEM, None)
+    return list(sections.items())
+
+
+def token_windows(text, tokenizer=None, size=CHUNK_TOKENS, overlap=CHUNK_OVERLAP):
+    """
+    Overlapping windows of at most size tokens, as substrings of text. Uses the
+    model's fast tokenizer offsets when given one, otherwise whitespace words
+    (about 1.3 wordpiece tokens each, so windows shrink to match).
+    """
+    if tokenizer is not None:
+        offsets = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True, verbose=False)["offset_mapping"]
+        spans = [(start, end) for start, end in offsets if end > start]
+    else:
+        spans = [m.span() for m in re.finditer(r"\S+", text)]
+        size, overlap = max(1, int(size / 1.3)), int(overlap / 1.3)
+
+    step = max(1, size - overlap)
+    windows = []
+    for first in range(0, len(spans), step):
+        last = min(first + size, len(spans)) - 1
+        windows.append(text[spans[first][0]:spans[last][1]])
+        if last == len(spans) - 1:
+            break
+    return windows
+
+
+def chunk_filing(narrative, tokenizer=None, size=CHUNK_TOKENS, max_chunks=MAX_CHUNKS_PER_FILING):
+    """[(item, chunk_text)] for one filing, at most max_chunks, taken round-robin across Items."""
+    per_item = [(item, token_windows(body, tokenizer, size)) for item, body in split_items(narrative)]
+    chunks = []
+    depth = 0
+    while len(chunks) < max_chunks and any(depth < len(windows) for _, windows in per_item):
+        for item, windows in per_item:
+            if depth < len(windows) and len(chunks) < max_chunks:
+                chunks.append((item, windows[depth]))
+        depth += 1
+    return chunks
@@ -0,0 +1,149 @@
+"""
+Response encoding for large JSON payloads.
+
+- dumps: orjson serialization, used for every JSON body (also installed as
+  the Flask app's JSON provider, so jsonify goes through it).
+- columnar: a compact shape for /getInfo (?shape=columnar) that sends trades
+  and prices as one array per field instead of one object per row.
+- representation: the bytes to send for a cached body given the requested
+  shape and Accept-Encoding, brotli or gzip compressed above
+  COMPRESS_MIN_BYTES. Each representation gets its own ETag, and recently
+  built ones are kept in memory so cache hits skip re-encoding.
+"""
+
+import gzip
+import os
+import threading
+from collections import OrderedDict
+
+import orjson
+from flask.json.provider import JSONProvider
+
+try:
+    import brotli
+except ImportError:
+    print("Warning: Brotli not installed, /getInfo will only offer gzip. Please run 'pip install Brotli'")
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", 1024))
+GZIP_LEVEL = 6
+# Quality 5 keeps most of brotli's size win at a fraction of the CPU cost of 11
+BROTLI_QUALITY = 5
+REPRESENTATION_CACHE_SIZE = 256
+
+SHAPES = ("rows", "columnar")
+_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(value):
+    # Anything orjson has no native encoding for (Decimal, sets, ...)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    return str(value)
+
+
+def dumps(obj) -> bytes:
+    return orjson.dumps(obj, default=_default, option=_OPTIONS)
+
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson."""
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj), mimetype="application/json")
+
+
+def _columns(rows):
+    """[{...}, ...] -> {field: [values]} over the union of fields, None where a row lacks one."""
+    fields = list(dict.fromkeys(field for row in rows for field in row))
+    return {field: [row.get(field) for row in rows] for field in fields}
+
+
+def columnar(payload):
+    """
+    Compact /getInfo shape: insiders without their trades, one trades table
+    (the insider column indexes into insiders) and one prices table.
+    """
+    insiders, trades = [], []
+    for i, insider in enumerate(payload.get("insiders", [])):
+        insiders.append({k: v for k, v in insider.items() if k != "trades"})
+        trades.extend({"insider": i, **trade} for trade in insider.get("trades", []))
+    return {
+        **payload,
+        "shape": "columnar",
+        "insiders": insiders,
+        "trades": _columns(trades),
+        "stock_data": _columns(payload.get("stock_data", [])),
+    }
+
+
+def negotiate(accept_encoding, size):
+    """Pick 'br', 'gzip' or None for a body of size bytes from an Accept-Encoding header."""
+    if size < COMPRESS_MIN_BYTES or not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    for encoding in (["br"] if brotli else []) + ["gzip"]:
+        if accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return None
+
+
+def _compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+_representations = OrderedDict()
+_representations_lock = threading.Lock()
+
+
+def representation(body, etag, shape=None, accept_encoding=None):
+    """
+    Bytes to send for a cached rows-shaped JSON body.
+    Returns (body, etag, content_encoding or None).
+    """
+    shape = shape if shape in SHAPES else "rows"
+    if shape == "rows":
+        shaped, shaped_etag = body, etag
+    else:
+        shaped, shaped_etag = None, f"{etag}-{shape}"
+    # Negotiate on the identity size; the columnar body is smaller but the same order of magnitude
+    encoding = negotiate(accept_encoding, len(body))
+    if shape == "rows" and encoding is None:
+        return body, etag, None
+
+    key = (etag, shape, encoding)
+    with _representations_lock:
+        cached = _representations.get(key)
+        if cached is not None:
+            _representations.move_to_end(key)
+            return cached
+    if shaped is None:
+        shaped = dumps(columnar(orjson.loads(body)))
+    result = (
+        (_compress(shaped, encoding), f"{shaped_etag}-{encoding}", encoding)
+        if encoding else (shaped, shaped_etag, None)
+    )
+    with _representations_lock:
+        _representations[key] = result
+        while len(_representations) > REPRESENTATION_CACHE_SIZE:
+            _representations.popitem(last=False)
+    return result
@@ -0,0 +1,272 @@
+"""
+Columnar bulk export of insider trades, owners and 8-K sentiment events.
+
+Records come from the same /getInfo payloads the API serves (get_company's
+insiders and getSentiment's events): a cached payload is reused, otherwise
+the lookup runs and its result is cached. Issuers are processed one at a
+time and rows are flushed every EXPORT_BATCH_ROWS as one Parquet row group
+or Arrow IPC record batch, so memory stays flat however many issuers or
+trades are exported.
+
+A failed issuer lookup (e.g. a 429 from SEC, or 8-K sentiment that could not
+be computed for the sentiment table) never yields a silently incomplete file:
+the HTTP export aborts the stream, leaving the file without its footer, while
+the Parquet CLI skips the issuer, lists skipped CIKs in that table's footer
+metadata (key "skipped_ciks") and exits with status 1. An Arrow IPC stream
+carries its metadata in the schema, written before any issuer is looked up,
+so Arrow exports have no skip mode: the CLI deletes the partial file and
+exits with status 1.
+
+Run from backend/:
+
+    python -m services.export AAPL MSFT 1045810 --start 2025-01-01 --out exports/
+    python -m services.export AAPL --format arrow --tables trades --out exports/
+"""
+
+import argparse
+import os
+import sys
+
+import orjson
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .response_cache import response_cache
+from .scoring import parse_date
+
+EXPORT_BATCH_ROWS = int(os.environ.get("EXPORT_BATCH_ROWS", 50000))
+EXPORT_MAX_COMPANIES = int(os.environ.get("EXPORT_MAX_COMPANIES", 500))
+
+FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+
+SCHEMAS = {
+    "trades": pa.schema([
+        ("cik", pa.string()),
+        ("ticker", pa.string()),
+        ("insider_cik", pa.string()),
+        ("insider_name", pa.string()),
+        ("date", pa.date32()),
+        ("security", pa.string()),
+        ("transaction_code", pa.string()),
+        ("transaction_type", pa.string()),
+        ("acquired_disposed", pa.string()),
+        ("shares", pa.float64()),
+        ("price_per_share", pa.float64()),
+        ("shares_owned_after", pa.float64()),
+        ("exercise_price", pa.float64()),
+        ("underlying_shares", pa.float64()),
+    ]),
+    "owners": pa.schema([
+        ("cik", pa.string()),
+        ("ticker", pa.string()),
+        ("insider_cik", pa.string()),
+        ("insider_name", pa.string()),
+        ("roles", pa.list_(pa.string())),
+        ("trades", pa.int32()),
+    ]),
+    "sentiment": pa.schema([
+        ("cik", pa.string()),
+        ("ticker", pa.string()),
+        ("filing_date", pa.date32()),
+        ("url", pa.string()),
+        ("impact", pa.string()),
+        ("confidence", pa.string()),
+        ("summary", pa.string()),
+    ]),
+}
+
+
+def load_payload(cik):
+    """The /getInfo payload for a CIK: from the response cache if present, else built and cached like /getInfo does."""
+    from routes.getInfo import build_company_payload, cache_key, store_payload
+
+    entry = response_cache.get(cache_key(str(cik)))
+    if entry is not None:
+        return orjson.loads(entry.body)
+    payload = build_company_payload(str(cik))
+    store_payload(str(cik), payload)
+    return payload
+
+
+def _in_range(value, start, end):
+    day = parse_date(value)
+    if day is None:
+        return False
+    return (start is None or day >= start) and (end is None or day <= end)
+
+
+def _day(value):
+    day = parse_date(value)
+    return day.date() if day else None
+
+
+def rows(table, payload, start=None, end=None):
+    """Flatten one /getInfo payload into rows of the given table, keeping only dates in [start, end]."""
+    company = {"cik": str(payload.get("cik")), "ticker": payload.get("ticker")}
+    if table == "sentiment":
+        for event in payload.get("sentiment") or []:
+            if not _in_range(event.get("filing_date"), start, end):
+                continue
+            prediction = (event.get("vector_prediction") or {})
+            vote = prediction.get("vector_prediction") or {}
+            yield {**company, "filing_date": _day(event.get("filing_date")), "url": event.get("url"),
+                   "impact": vote.get("impact"), "confidence": vote.get("confidence"),
+                   "summary": prediction.get("summary")}
+        return
+
+    for insider in payload.get("insiders") or []:
+        insider_fields = {**company, "insider_cik": insider.get("cik"), "insider_name": insider.get("name")}
+        trades = [t for t in insider.get("trades", []) if _in_range(t.get("date"), start, end)]
+        if table == "owners":
+            if trades or (start is None and end is None):
+                yield {**insider_fields, "roles": insider.get("roles", []), "trades": len(trades)}
+            continue
+        for trade in trades:
+            yield {**insider_fields, **{k: trade.get(k) for k in SCHEMAS["trades"].names if k in trade},
+                   "date": _day(trade.get("date"))}
+
+
+def record_batches(table, ciks, start=None, end=None, batch_rows=EXPORT_BATCH_ROWS, skipped=None):
+    """
+    Yield RecordBatches of at most batch_rows rows across all issuers, one issuer payload in memory at a time.
+    A failed lookup raises, unless a skipped dict is given to collect {cik: error} instead.
+    A payload whose sentiment stage failed counts as a failed lookup for the sentiment table.
+    """
+    schema = SCHEMAS[table]
+    pending = []
+    for cik in ciks:
+        try:
+            payload = load_payload(cik)
+            if table == "sentiment" and payload.get("sentiment") is None:
+                raise LookupError("8-K sentiment unavailable")
+        except Exception as e:
+            if skipped is None:
+                raise RuntimeError(f"Export failed for CIK {cik}: {e}") from e
+            print(f"Export skipped CIK {cik}: {e}")
+            skipped[str(cik)] = str(e)
+            continue
+        for row in rows(table, payload, start, end):
+            pending.append(row)
+            if len(pending) >= batch_rows:
+                yield pa.RecordBatch.from_pylist(pending, schema=schema)
+                pending = []
+    if pending:
+        yield pa.RecordBatch.from_pylist(pending, schema=schema)
+
+
+class _ChunkSink:
+    """Write-only file object that hands written bytes back to a streaming response."""
+
+    def __init__(self):
+        self.chunks = []
+        self.closed = False
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data, self.chunks = b"".join(self.chunks), []
+        return data
+
+
+def _writer(fmt, sink, schema):
+    if fmt == "parquet":
+        return pq.ParquetWriter(sink, schema, compression="zstd")
+    return pa.ipc.new_stream(sink, schema)
+
+
+def stream(table, ciks, start=None, end=None, fmt="parquet", batch_rows=EXPORT_BATCH_ROWS, skipped=None):
+    """
+    Yield the encoded export as byte chunks, one per row group / record batch (plus header and footer).
+    With a skipped dict (Parquet only), failed issuers are left out and recorded (see record_batches);
+    otherwise the stream stops without its footer so the partial file cannot be read as complete.
+    """
+    if skipped is not None and fmt != "parquet":
+        raise ValueError("Skipped issuers can only be recorded in Parquet exports")
+    sink = _ChunkSink()
+    writer = _writer(fmt, pa.PythonFile(sink, mode="w"), SCHEMAS[table])
+    try:
+        for batch in record_batches(table, ciks, start, end, batch_rows, skipped):
+            if fmt == "parquet":
+                writer.write_batch(batch, row_group_size=batch_rows)
+            else:
+                writer.write_batch(batch)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+        if skipped:
+            writer.add_key_value_metadata({"skipped_ciks": orjson.dumps(sorted(skipped)).decode()})
+    finally:
+        # Closing writes the footer; on failure it goes to the sink and is never sent
+        writer.close()
+    yield sink.drain()
+
+
+def export_to_dir(out_dir, ciks, tables=tuple(SCHEMAS), start=None, end=None, fmt="parquet", batch_rows=EXPORT_BATCH_ROWS):
+    """
+    Write one file per table. Returns {table: {cik: error}} for the tables that left issuers out.
+    Arrow exports raise on the first failed issuer instead, after deleting the partial file.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    skipped = {}
+    for table in tables:
+        path = os.path.join(out_dir, f"{table}.{FORMATS[fmt][1]}")
+        table_skipped = {} if fmt == "parquet" else None
+        written = 0
+        try:
+            with open(path, "wb") as f:
+                for chunk in stream(table, ciks, start, end, fmt, batch_rows, table_skipped):
+                    f.write(chunk)
+                    written += len(chunk)
+        except Exception:
+            os.remove(path)
+            raise
+        print(f"Wrote {path} ({written / 1024:.0f} KiB)")
+        if table_skipped:
+            skipped[table] = table_skipped
+    return skipped
+
+
+def main():
+    from routes.autofill import resolve_company
+
+    parser = argparse.ArgumentParser(description="Export insider trades, owners and 8-K sentiment as Parquet or Arrow.")
+    parser.add_argument("companies", nargs="+", help="CIKs or tickers")
+    parser.add_argument("--start", type=parse_date, help="YYYY-MM-DD")
+    parser.add_argument("--end", type=parse_date, help="YYYY-MM-DD")
+    parser.add_argument("--format", choices=list(FORMATS), default="parquet")
+    parser.add_argument("--tables", default=",".join(SCHEMAS))
+    parser.add_argument("--batch-rows", type=int, default=EXPORT_BATCH_ROWS)
+    parser.add_argument("--out", default="exports")
+    args = parser.parse_args()
+
+    ciks = []
+    for query in args.companies:
+        entry = resolve_company(query)
+        if entry is None:
+            print(f"Unknown CIK or ticker: {query}")
+        else:
+            ciks.append(entry["cik_str"])
+    try:
+        skipped = export_to_dir(args.out, list(dict.fromkeys(ciks)), args.tables.split(","), args.start, args.end, args.format, args.batch_rows)
+    except RuntimeError as e:
+        print(f"Export aborted: {e}")
+        sys.exit(1)
+    for table, table_skipped in skipped.items():
+        print(f"Incomplete {table} export, skipped {len(table_skipped)} CIK(s): {', '.join(sorted(table_skipped))}")
+    if skipped:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
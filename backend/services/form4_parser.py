@@ -0,0 +1,220 @@
+"""
+Parsing helpers for SEC Form 4 filings.
+
+These are pure functions over already-downloaded text so they can run on any
+executor (thread or process) without pulling in the web app, the embedding
+model or a database client.
+"""
+
+from bs4 import BeautifulSoup
+
+
+def find_form4_xml_url(index_html, cik, accession):
+    """
+    Locate the Form 4 XML document on a filing directory listing page.
+    Returns an absolute URL, or None if the listing has no XML link.
+    """
+    file_soup = BeautifulSoup(index_html, 'html.parser')
+    # look for .xml link
+    xml_link_tag = file_soup.find('a', href=lambda href: href and href.endswith('.xml'))
+    if not xml_link_tag:
+        # sometimes the index page lists files differently; fallback to searching for files with .xml in text
+        links = file_soup.find_all('a')
+        xml_href = None
+        for tag in links:
+            href = tag.get('href', '')
+            if '.xml' in href:
+                xml_href = href
+                break
+        if xml_href:
+            xml_file_url = xml_href
+        else:
+            print(f"No XML file link found for filing {accession}")
+            return None
+    else:
+        xml_file_url = xml_link_tag['href']
+
+    # Ensure full URL
+    if xml_file_url.startswith('/'):
+        xml_full_url = f"https://www.sec.gov{xml_file_url}"
+    elif xml_file_url.startswith('http'):
+        xml_full_url = xml_file_url
+    else:
+        xml_full_url = f"https://www.sec.gov/Archives/edgar/data/{int(cik)}/{accession}/{xml_file_url}"
+
+    return xml_full_url
+
+
+def parse_form4_xml(xml_text):
+    """
+    Parse a Form 4 XML document.
+
+    Returns:
+        (transactions, owners) where transactions is a list of trade dicts and
+        owners is a list of {'name', 'cik', 'roles'} dicts for each reporting owner.
+    """
+    xml_soup = BeautifulSoup(xml_text, 'xml')
+
+    # Extract transactions from both tables
+    transactions = []
+
+    # Process non-derivative transactions
+    non_deriv_transactions = xml_soup.find_all('nonDerivativeTransaction')
+    for trans in non_deriv_transactions:
+        trade = {}
+
+        # Security title
+        security_title = trans.find('securityTitle')
+        trade['security'] = security_title.find('value').text if security_title and security_title.find('value') else 'N/A'
+
+        # Transaction date
+        trans_date = trans.find('transactionDate')
+        trade['date'] = trans_date.find('value').text if trans_date and trans_date.find('value') else 'N/A'
+
+        # Transaction code (M=Exercise, F=Tax withholding, S=Sale, etc.)
+        trans_coding = trans.find('transactionCoding')
+        if trans_coding:
+            trade['transaction_code'] = trans_coding.find('transactionCode').text if trans_coding.find('transactionCode') else 'N/A'
+        else:
+            trade['transaction_code'] = 'N/A'
+
+        # Transaction amounts
+        trans_amounts = trans.find('transactionAmounts')
+        if trans_amounts:
+            shares = trans_amounts.find('transactionShares')
+            trade['shares'] = float(shares.find('value').text) if shares and shares.find('value') else 0
+
+            price = trans_amounts.find('transactionPricePerShare')
+            if price and price.find('value'):
+                trade['price_per_share'] = float(price.find('value').text)
+            else:
+                trade['price_per_share'] = None  # Could be exercise/grant with no price
+
+            acq_disp = trans_amounts.find('transactionAcquiredDisposedCode')
+            trade['acquired_disposed'] = acq_disp.find('value').text if acq_disp and acq_disp.find('value') else 'N/A'
+
+        # Post-transaction amounts
+        post_trans = trans.find('postTransactionAmounts')
+        if post_trans:
+            shares_owned = post_trans.find('sharesOwnedFollowingTransaction')
+            trade['shares_owned_after'] = float(shares_owned.find('value').text) if shares_owned and shares_owned.find('value') else 0
+
+        trade['transaction_type'] = 'non-derivative'
+        transactions.append(trade)
+
+    # Process derivative transactions (options, RSUs, etc.)
+    deriv_transactions = xml_soup.find_all('derivativeTransaction')
+    for trans in deriv_transactions:
+        trade = {}
+
+        # Security title
+        security_title = trans.find('securityTitle')
+        trade['security'] = security_title.find('value').text if security_title and security_title.find('value') else 'N/A'
+
+        # Transaction date
+        trans_date = trans.find('transactionDate')
+        trade['date'] = trans_date.find('value').text if trans_date and trans_date.find('value') else 'N/A'
+
+        # Transaction code
+        trans_coding = trans.find('transactionCoding')
+        if trans_coding:
+            trade['transaction_code'] = trans_coding.find('transactionCode').text if trans_coding.find('transactionCode') else 'N/A'
+        else:
+            trade['transaction_code'] = 'N/A'
+
+        # Transaction amounts
+        trans_amounts = trans.find('transactionAmounts')
+        if trans_amounts:
+            shares = trans_amounts.find('transactionShares')
+            trade['shares'] = float(shares.find('value').text) if shares and shares.find('value') else 0
+
+            price = trans_amounts.find('transactionPricePerShare')
+            if price and price.find('value'):
+                trade['price_per_share'] = float(price.find('value').text)
+            else:
+                trade['price_per_share'] = None
+
+            acq_disp = trans_amounts.find('transactionAcquiredDisposedCode')
+            trade['acquired_disposed'] = acq_disp.find('value').text if acq_disp and acq_disp.find('value') else 'N/A'
+
+        # Conversion/Exercise price
+        conv_price = trans.find('conversionOrExercisePrice')
+        if conv_price and conv_price.find('value'):
+            trade['exercise_price'] = float(conv_price.find('value').text)
+        else:
+            trade['exercise_price'] = None
+
+        # Underlying security
+        underlying = trans.find('underlyingSecurity')
+        if underlying:
+            underlying_shares = underlying.find('underlyingSecurityShares')
+            trade['underlying_shares'] = float(underlying_shares.find('value').text) if underlying_shares and underlying_shares.find('value') else 0
+
+        # Post-transaction amounts
+        post_trans = trans.find('postTransactionAmounts')
+        if post_trans:
+            shares_owned = post_trans.find('sharesOwnedFollowingTransaction')
+            trade['shares_owned_after'] = float(shares_owned.find('value').text) if shares_owned and shares_owned.find('value') else 0
+
+        trade['transaction_type'] = 'derivative'
+        transactions.append(trade)
+
+    # There can be multiple reportingOwner entries
+    owners = []
+    for ro in xml_soup.find_all('reportingOwner'):
+        name_tag = ro.find('rptOwnerName')
+        owner_name = name_tag.text.strip() if name_tag else 'N/A'
+        owner_cik_tag = ro.find('rptOwnerCik')
+        owner_cik = owner_cik_tag.text.strip() if owner_cik_tag else 'N/A'
+
+        # Get relationship information
+        rel = ro.find('reportingOwnerRelationship')
+        roles = []
+
+        if rel:
+            isDirector = rel.find('isDirector').text if rel.find('isDirector') else '0'
+            isOfficer = rel.find('isOfficer').text if rel.find('isOfficer') else '0'
+            officerTitle = rel.find('officerTitle').text if rel.find('officerTitle') else ''
+            isTenPercentOwner = rel.find('isTenPercentOwner').text if rel.find('isTenPercentOwner') else '0'
+            isOther = rel.find('isOther').text if rel.find('isOther') else '0'
+
+            if isDirector == '1':
+                roles.append('Director')
+            if isOfficer == '1':
+                roles.append(officerTitle or 'Officer')
+            if isTenPercentOwner == '1':
+                roles.append('10% Owner')
+            if isOther == '1':
+                roles.append('Other')
+
+        owners.append({'name': owner_name, 'cik': owner_cik, 'roles': roles})
+
+    return transactions, owners
+
+
+def merge_owners(owner_info, owners, transactions):
+    """Fold one filing's reporting owners and transactions into owner_info (keyed by owner CIK)."""
+    for owner in owners:
+        owner_cik = owner['cik']
+        if owner_cik not in owner_info:
+            owner_info[owner_cik] = {
+                'name': owner['name'],
+                'cik': owner_cik,
+                'roles': set(owner['roles']),
+                'trades': transactions.copy()  # Copy transactions for this filing
+            }
+        else:
+            # Update roles if new ones found
+            owner_info[owner_cik]['roles'].update(owner['roles'])
+            # Append new transactions
+            owner_info[owner_cik]['trades'].extend(transactions.copy())
+
+
+def owner_list(owner_info):
+    """Convert the owner_info accumulator into the JSON-friendly list returned by /getInfo."""
+    # Convert sets to lists in the owner_info dictionary
+    for owner_cik, info in owner_info.items():
+        info['roles'] = list(info['roles'])
+
+    # Convert the dictionary values to a list
+    return list(owner_info.values())
@@ -1,8 +1,6 @@
 
 import math
-from statistics import mean
-from datetime import datetime, timedelta
-import yfinance as yf
+import numpy as np
 
 def sigmoid(x):
     return 1 / (1 + math.exp(-x))
@@ -38,13 +36,74 @@ def compute_car(prices, event_idx, N=3, est_window=60):
     hist_rets = returns(historical)
     if not hist_rets:
         return 0.0
-    expected = mean(hist_rets)
+    expected = sum(hist_rets) / len(hist_rets)
 
     window_prices = [p[1] for p in prices[event_idx:event_idx + N + 1]]
     window_rets = returns(window_prices)
     ar = [r - expected for r in window_rets]
     return sum(ar)
 
+class MarketModel:
+    """
+    Market-model abnormal returns for one ticker against a benchmark index.
+
+    Expected return on day t is alpha + beta * r_m[t], with alpha/beta fitted
+    by OLS on the est_window daily returns before the event. Every rolling
+    fit and every N-day CAR is computed at once from cumulative sums, so
+    scoring an event is a dictionary lookup.
+
+    prices: [(date, close)] for the ticker
+    benchmark: {date: close} for the index (e.g. SPY); days missing from
+    either series are dropped
+    """
+
+    def __init__(self, prices, benchmark, N=3, est_window=60, min_obs=20):
+        days, closes, index_closes = [], [], []
+        for day, close in prices:
+            index_close = benchmark.get(day)
+            if index_close and close:
+                days.append(day)
+                closes.append(close)
+                index_closes.append(index_close)
+        self.index = {day: i for i, day in enumerate(days)}
+        self.car_by_day = np.zeros(len(days))
+        if len(days) < N + 3:
+            return
+
+        p = np.asarray(closes, dtype=float)
+        m = np.asarray(index_closes, dtype=float)
+        r = p[1:] / p[:-1] - 1  # r[t]: return from day t to day t+1
+        rm = m[1:] / m[:-1] - 1
+
+        def cumsum(x):
+            return np.concatenate(([0.0], np.cumsum(x)))
+
+        Sx, Sy, Sxx, Sxy = cumsum(rm), cumsum(r), cumsum(rm * rm), cumsum(rm * r)
+
+        # Estimation window for an event on day e: returns e-est_window .. e-1
+        e = np.arange(len(p))
+        lo, hi = np.maximum(0, e - est_window), np.minimum(e, len(r))
+        n = (hi - lo).astype(float)
+        sx, sy = Sx[hi] - Sx[lo], Sy[hi] - Sy[lo]
+        sxx, sxy = Sxx[hi] - Sxx[lo], Sxy[hi] - Sxy[lo]
+        var = n * sxx - sx * sx
+        # Too few observations or a flat index: fall back to the mean-return model
+        fit = (n >= min_obs) & (var > 1e-18)
+        beta = np.divide(n * sxy - sx * sy, var, out=np.zeros_like(var), where=fit)
+        alpha = np.divide(sy - beta * sx, n, out=np.zeros_like(n), where=n > 0)
+        self.alpha, self.beta = alpha, beta
+
+        # Event window: returns e .. e+N-1, same bounds as compute_car
+        valid = (e >= 2) & (e < len(p) - N - 1)
+        end = np.minimum(e + N, len(r))
+        actual = Sy[end] - Sy[np.minimum(e, len(r))]
+        market = Sx[end] - Sx[np.minimum(e, len(r))]
+        self.car_by_day = np.where(valid, actual - N * alpha - beta * market, 0.0)
+
+    def car(self, event_date):
+        i = self.index.get(event_date)
+        return 0.0 if i is None else float(self.car_by_day[i])
+
 def price_movement_score(car, car_threshold=0.03, scale=0.02, sentiment=None):
     """Scores how strongly the price moved abnormally after the event."""
     mag = abs(car)
@@ -69,11 +128,12 @@ def trade_size_score(shares, insider_shares=None, outstanding=None):
 
 # --- Main integrity function ---
 
-def integrity_score(trade, prices, events):
+def integrity_score(trade, prices, events, market=None):
     """
     trade: dict with keys {'type','shares','insider_holdings','total_outstanding','date'}
     prices: list of tuples [(date, close_price)]
     events: list of dicts [{'date','sentiment','confidence'}]
+    market: optional MarketModel for the same ticker; without one CAR uses the mean-return model
     insider_history: list of prior risk flags (optional)
     """
     # Find nearest event within 30 days after trade
@@ -84,13 +144,13 @@ def integrity_score(trade, prices, events):
         event = min(candidate_events, key=lambda e: (e['date'] - trade['date']).days)
         T = time_score(trade['date'], event['date'])
         S = sentiment_match_score(trade['type'], event['sentiment'], event['confidence'])
-        # Find index of event date in price list
-        event_idx = next((i for i, p in enumerate(prices) if p[0] == event['date']), None)
-        if event_idx is None:
-            P = 0
+        if market is not None:
+            # The model's date index replaces the scan over prices
+            P = price_movement_score(market.car(event['date']), sentiment=event['sentiment']) if event['date'] in market.index else 0
         else:
-            CAR = compute_car(prices, event_idx)
-            P = price_movement_score(CAR, sentiment=event['sentiment'])
+            # Find index of event date in price list
+            event_idx = next((i for i, p in enumerate(prices) if p[0] == event['date']), None)
+            P = 0 if event_idx is None else price_movement_score(compute_car(prices, event_idx), sentiment=event['sentiment'])
 
     Q = trade_size_score(trade['shares'],
                          insider_shares=trade.get('insider_holdings'),
@@ -0,0 +1,229 @@
+"""
+Anomaly ranking over every issuer in the local store.
+
+The local store is the /getInfo response cache: every company looked up,
+screened or refreshed leaves its full payload there. The ranking only covers
+issuers that are in the cache, so for a market-wide board fill it first with
+--populate (a list of tickers/CIKs, or "all" for every SEC-listed ticker),
+which runs the /screen pipeline and skips issuers whose payload is still
+fresh. A ranking run splits
+those issuers into partitions, scores every trade in the date range on a
+process pool, keeps a top-K heap per partition and merges the partition
+heaps into the leaderboard table (same SQLite file, so every worker serves
+the same board).
+
+Run from backend/:
+
+    python -m services.leaderboard                       # this quarter, top 100
+    python -m services.leaderboard --start 2025-01-01 --end 2025-03-31 -k 250 --workers 8
+    python -m services.leaderboard --populate AAPL,MSFT,NVDA   # look these up first
+"""
+
+import argparse
+import heapq
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+
+from .response_cache import CACHE_PATH, ResponseCache
+from .scoring import benchmark_series, market_model, parse_date, price_series, score_trades, sentiment_events
+
+LEADERBOARD_K = int(os.environ.get("LEADERBOARD_K", 100))
+LEADERBOARD_WORKERS = int(os.environ.get("LEADERBOARD_WORKERS", os.cpu_count() or 1))
+# Issuers per partition; small enough to spread load, big enough to amortise process hand-off
+LEADERBOARD_PARTITION_SIZE = int(os.environ.get("LEADERBOARD_PARTITION_SIZE", 50))
+# Only the most recent runs are kept
+LEADERBOARD_KEEP_RUNS = 5
+
+CACHE_PREFIX = "getInfo:"
+
+
+def _connect(path=CACHE_PATH):
+    return sqlite3.connect(path, timeout=30)
+
+
+def init_tables(path=CACHE_PATH):
+    """Create the leaderboard tables; run once per process by the build and by the route at import."""
+    with _connect(path) as conn:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS leaderboard_runs (
+                run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                start_date TEXT NOT NULL,
+                end_date TEXT NOT NULL,
+                k INTEGER NOT NULL,
+                issuers INTEGER NOT NULL,
+                trades_scored INTEGER NOT NULL,
+                seconds REAL NOT NULL,
+                finished_at REAL NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS leaderboard (
+                run_id INTEGER NOT NULL,
+                rank INTEGER NOT NULL,
+                cik TEXT NOT NULL,
+                ticker TEXT,
+                risk REAL NOT NULL,
+                trade TEXT NOT NULL,
+                PRIMARY KEY (run_id, rank)
+            )
+            """
+        )
+
+
+def quarter_start(day):
+    return date(day.year, 3 * ((day.month - 1) // 3) + 1, 1)
+
+
+def partitions(keys, size=LEADERBOARD_PARTITION_SIZE):
+    return [keys[i:i + size] for i in range(0, len(keys), size)]
+
+
+def rank_partition(path, keys, start, end, k, benchmark):
+    """
+    Score every trade dated within [start, end] for the issuers in keys.
+    Returns (top k trades as (risk, record) pairs, issuers read, trades scored).
+    Runs in a pool process, so it reads the store over its own connection;
+    the benchmark series is fetched once by the parent and passed in.
+    """
+    placeholders = ",".join("?" * len(keys))
+    with _connect(path) as conn:
+        rows = conn.execute(f"SELECT key, body FROM responses WHERE key IN ({placeholders})", keys).fetchall()
+
+    heap, issuers, scored = [], 0, 0
+    for key, body in rows:
+        try:
+            payload = json.loads(bytes(body))
+        except ValueError:
+            print(f"Skipping unreadable cache entry {key}")
+            continue
+        if not payload.get("success"):
+            continue
+        issuers += 1
+        insiders = [
+            {**insider, "trades": [t for t in insider.get("trades", []) if start <= (parse_date(t.get("date")) or datetime.min) <= end]}
+            for insider in payload.get("insiders", [])
+        ]
+        prices = price_series(payload.get("stock_data"))
+        market = market_model(payload.get("ticker"), prices, benchmark)
+        trades = score_trades(insiders, prices, sentiment_events(payload.get("sentiment")), market)
+        for trade in trades:
+            scored += 1
+            # The counter breaks risk ties so records are never compared
+            item = (trade["risk"], scored, {"cik": str(payload.get("cik")), "ticker": payload.get("ticker"), **trade})
+            if len(heap) < k:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+    return [(risk, record) for risk, _, record in heap], issuers, scored
+
+
+def run_ranking(start=None, end=None, k=LEADERBOARD_K, workers=LEADERBOARD_WORKERS, path=CACHE_PATH):
+    """Rank every stored issuer's trades in [start, end] and publish the top k as a new leaderboard run."""
+    end = end or datetime.combine(date.today(), datetime.min.time())
+    start = start or datetime.combine(quarter_start(end), datetime.min.time())
+    init_tables(path)
+    began = time.perf_counter()
+
+    keys = ResponseCache(path).keys(CACHE_PREFIX)
+    chunks = partitions(keys)
+    print(f"Ranking {len(keys)} issuers in {len(chunks)} partitions on {workers} processes")
+
+    benchmark = benchmark_series()
+    merged, issuers, scored = [], 0, 0
+    if chunks:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(rank_partition, path, chunk, start, end, k, benchmark) for chunk in chunks]
+            for future in futures:
+                top, n_issuers, n_scored = future.result()
+                merged.extend(top)
+                issuers += n_issuers
+                scored += n_scored
+    top = heapq.nlargest(k, merged, key=lambda item: item[0])
+    elapsed = time.perf_counter() - began
+
+    # One transaction: readers see either the previous run or the complete new one
+    with _connect(path) as conn:
+        cur = conn.execute(
+            "INSERT INTO leaderboard_runs (start_date, end_date, k, issuers, trades_scored, seconds, finished_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"), k, issuers, scored, elapsed, time.time()),
+        )
+        run_id = cur.lastrowid
+        conn.executemany(
+            "INSERT INTO leaderboard (run_id, rank, cik, ticker, risk, trade) VALUES (?, ?, ?, ?, ?, ?)",
+            [(run_id, rank, record["cik"], record["ticker"], risk, json.dumps(record))
+             for rank, (risk, record) in enumerate(top, start=1)],
+        )
+        stale = "SELECT run_id FROM leaderboard_runs ORDER BY run_id DESC LIMIT -1 OFFSET ?"
+        conn.execute(f"DELETE FROM leaderboard WHERE run_id IN ({stale})", (LEADERBOARD_KEEP_RUNS,))
+        conn.execute(f"DELETE FROM leaderboard_runs WHERE run_id IN ({stale})", (LEADERBOARD_KEEP_RUNS,))
+
+    print(f"Scored {scored} trades from {issuers} issuers in {elapsed:.1f}s (run {run_id})")
+    return run_id
+
+
+def latest_leaderboard(limit=LEADERBOARD_K, path=CACHE_PATH):
+    """The most recent run's metadata and its top `limit` trades, or None before the first run."""
+    with _connect(path) as conn:
+        run = conn.execute(
+            "SELECT run_id, start_date, end_date, k, issuers, trades_scored, seconds, finished_at "
+            "FROM leaderboard_runs ORDER BY run_id DESC LIMIT 1"
+        ).fetchone()
+        if run is None:
+            return None
+        rows = conn.execute(
+            "SELECT rank, trade FROM leaderboard WHERE run_id = ? ORDER BY rank LIMIT ?", (run[0], limit)
+        ).fetchall()
+    return {
+        "run_id": run[0],
+        "start_date": run[1],
+        "end_date": run[2],
+        "k": run[3],
+        "issuers": run[4],
+        "trades_scored": run[5],
+        "seconds": round(run[6], 3),
+        "finished_at": datetime.fromtimestamp(run[7]).isoformat(timespec="seconds"),
+        "trades": [{"rank": rank, **json.loads(trade)} for rank, trade in rows],
+    }
+
+
+def populate(companies):
+    """
+    Bring the store up to date for companies (tickers/CIKs, or ["all"]) before
+    ranking, through the /screen pipeline: fresh entries are reused, the rest
+    are fetched, paced by the shared SEC budget, and cached.
+    """
+    from routes.autofill import get_ticker_index, resolve_company
+    from routes.screen import screen_companies
+
+    if companies == ["all"]:
+        entries = list(get_ticker_index()[0].values())
+    else:
+        entries = [entry for entry in map(resolve_company, companies) if entry is not None]
+    failed = 0
+    for row in screen_companies(entries):
+        failed += row.get("error") is not None
+    print(f"Populated {len(entries)} issuers ({failed} failed)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rank the most suspicious insider trades across every stored issuer.")
+    parser.add_argument("--start", type=parse_date, help="YYYY-MM-DD, default start of the current quarter")
+    parser.add_argument("--end", type=parse_date, help="YYYY-MM-DD, default today")
+    parser.add_argument("-k", type=int, default=LEADERBOARD_K)
+    parser.add_argument("--workers", type=int, default=LEADERBOARD_WORKERS)
+    parser.add_argument("--populate", help="comma-separated tickers/CIKs, or 'all', to look up before ranking")
+    args = parser.parse_args()
+    if args.populate:
+        populate([c.strip() for c in args.populate.split(",") if c.strip()])
+    run_ranking(args.start, args.end, args.k, args.workers)
+
+
+if __name__ == "__main__":
+    main()
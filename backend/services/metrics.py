@@ -0,0 +1,184 @@
+"""
+Lightweight in-process metrics for the lookup pipeline.
+
+Counters and histograms are rendered in the Prometheus text format by the
+/metrics route. span() times one pipeline stage, feeds the stage histogram and,
+when the current request opted in, the Server-Timing header.
+
+Values are per process: scrape each worker (or run a single worker with
+threads, as the Dockerfile does).
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+_lock = threading.Lock()
+_registry = {}
+
+# Per-request {stage: (total_seconds, count)} when Server-Timing was requested
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    body = ",".join('{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in pairs)
+    return "{" + body + "}"
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        # Snapshot under the lock: inc/set may add a label set mid-scrape
+        with _lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+
+    def set(self, value, **labels):
+        with _lock:
+            self._values[_label_key(labels)] = value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        # Snapshot under the lock: inc/set may add a label set mid-scrape
+        with _lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._values = {}
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with _lock:
+            counts, total, n = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value, n + 1)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        # Copy the bucket counts under the lock so a concurrent observe() is seen whole or not at all
+        with _lock:
+            values = sorted((key, (list(counts), total, n)) for key, (counts, total, n) in self._values.items())
+        for key, (counts, total, n) in values:
+            for bound, count in zip(self.buckets, counts):
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', bound)])} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, [('le', '+Inf')])} {n}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {n}")
+        return lines
+
+
+def counter(name, help_text):
+    with _lock:
+        return _registry.setdefault(name, Counter(name, help_text))
+
+
+def gauge(name, help_text):
+    with _lock:
+        return _registry.setdefault(name, Gauge(name, help_text))
+
+
+def histogram(name, help_text, buckets=DEFAULT_BUCKETS):
+    with _lock:
+        return _registry.setdefault(name, Histogram(name, help_text, buckets))
+
+
+def render():
+    """Render every registered metric in the Prometheus text exposition format."""
+    with _lock:
+        metrics = list(_registry.values())
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+STAGE_SECONDS = histogram("veritas_stage_duration_seconds", "Time spent in each lookup pipeline stage.")
+SEC_REQUESTS = counter("veritas_sec_requests_total", "HTTP requests made to SEC EDGAR, by status code.")
+SEC_RATE_LIMITED = counter("veritas_sec_rate_limited_total", "SEC responses with status 429.")
+SEC_RETRIES = counter("veritas_sec_retries_total", "SEC requests retried after a 429.")
+SEC_BYTES = counter("veritas_sec_response_bytes_total", "Bytes received from SEC EDGAR.")
+CACHE_REQUESTS = counter("veritas_cache_requests_total", "Cache lookups, by cache and result (hit, stale, miss).")
+EMBEDDING_BATCH_SIZE = histogram(
+    "veritas_embedding_batch_size", "Number of texts encoded per embedding call.", BATCH_BUCKETS
+)
+
+
+def record_sec_response(status_code, nbytes):
+    SEC_REQUESTS.inc(status=status_code)
+    SEC_BYTES.inc(nbytes)
+    if status_code == 429:
+        SEC_RATE_LIMITED.inc()
+
+
+@contextmanager
+def span(stage):
+    """Time a pipeline stage."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        timings = _request_timings.get()
+        if timings is not None:
+            with _lock:
+                total, count = timings.get(stage, (0.0, 0))
+                timings[stage] = (total + elapsed, count + 1)
+
+
+def start_request_timing(enabled):
+    """
+    Reset per-request timings at the start of a request. Worker threads are
+    reused, so this must run for every request, not only the opted-in ones.
+    """
+    _request_timings.set({} if enabled else None)
+
+
+def server_timing_header():
+    """Server-Timing value for the current request, or None if it did not opt in."""
+    timings = _request_timings.get()
+    if not timings:
+        return None
+    return ", ".join(
+        f'{stage};dur={total * 1000:.1f};desc="{count}x"' for stage, (total, count) in timings.items()
+    )
@@ -0,0 +1,195 @@
+"""
+SEC request pacing shared by every worker on the host.
+
+Two pieces work together:
+
+- SharedRateBudget: a requests-per-second budget kept in a file-locked SQLite
+  bucket (pyrate-limiter), so adding gunicorn workers or threads never adds
+  up to more than SEC_RATE_LIMIT requests/second against SEC's per-IP limit.
+  A 429 also sets a host-wide cooldown every worker honours.
+- AdaptiveConcurrency: an AIMD controller on in-flight requests in this
+  process. Each 429 halves the limit, each success grows it by about one
+  slot per round trip, bounded by [1, SEC_MAX_CONCURRENCY]. Threads wait on
+  a Condition; coroutines (enter_async) wait on a future that leave() resolves,
+  so neither polls.
+"""
+
+import asyncio
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from pyrate_limiter import Duration, Limiter, Rate, SQLiteBucket
+
+from .metrics import gauge
+
+# SEC allows 10 requests/second per IP; stay a little under it by default
+SEC_RATE_LIMIT = int(os.environ.get("SEC_RATE_LIMIT", 8))
+SEC_RATE_DB = os.environ.get("SEC_RATE_DB", os.path.join(tempfile.gettempdir(), "veritas_sec_rate.sqlite"))
+SEC_MAX_CONCURRENCY = int(os.environ.get("SEC_MAX_CONCURRENCY", 8))
+# Cooldown after a 429 when SEC sends no Retry-After
+SEC_429_COOLDOWN = float(os.environ.get("SEC_429_COOLDOWN", 2))
+
+CONCURRENCY_LIMIT = gauge("veritas_sec_concurrency_limit", "Current AIMD limit on in-flight SEC requests.")
+COOLDOWN_SECONDS = gauge("veritas_sec_cooldown_seconds", "Seconds left in the host-wide 429 cooldown.")
+
+
+class SharedRateBudget:
+    def __init__(self, rate_per_second=SEC_RATE_LIMIT, db_path=SEC_RATE_DB):
+        self.rate_per_second = rate_per_second
+        self.db_path = db_path
+        self._limiter = None
+        self._pid = None
+        self._init_lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS sec_cooldown (id INTEGER PRIMARY KEY CHECK (id = 0), until REAL NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO sec_cooldown (id, until) VALUES (0, 0)")
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    @property
+    def limiter(self):
+        # SQLite connections must not cross fork(), so each worker process opens its own
+        with self._init_lock:
+            if self._pid == os.getpid():
+                return self._limiter
+            bucket = SQLiteBucket.init_from_file(
+                [Rate(self.rate_per_second, Duration.SECOND)],
+                table="sec_rate", db_path=self.db_path, use_file_lock=True,
+            )
+            self._limiter = Limiter(bucket, raise_when_fail=False)
+            self._pid = os.getpid()
+            return self._limiter
+
+    def cooldown_remaining(self):
+        with self._connect() as conn:
+            until = conn.execute("SELECT until FROM sec_cooldown WHERE id = 0").fetchone()[0]
+        remaining = max(0.0, until - time.time())
+        COOLDOWN_SECONDS.set(remaining)
+        return remaining
+
+    def penalize(self, seconds):
+        """Start (or extend) the host-wide cooldown after a 429."""
+        with self._connect() as conn:
+            conn.execute("UPDATE sec_cooldown SET until = MAX(until, ?) WHERE id = 0", (time.time() + seconds,))
+
+    def try_acquire(self):
+        """
+        Take one request from the shared budget without blocking.
+        Returns 0 on success, otherwise the number of seconds to wait before retrying.
+        """
+        remaining = self.cooldown_remaining()
+        if remaining > 0:
+            return remaining
+        if self.limiter.try_acquire("sec"):
+            return 0
+        return 1 / self.rate_per_second
+
+    def acquire(self):
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return
+            time.sleep(wait)
+
+
+class AdaptiveConcurrency:
+    def __init__(self, max_limit=SEC_MAX_CONCURRENCY, min_limit=1):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+        # (loop, future) for coroutines waiting in enter_async, oldest first
+        self._async_waiters = []
+        CONCURRENCY_LIMIT.set(self.limit)
+
+    def enter(self):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    async def enter_async(self):
+        """enter() for coroutines: waits without blocking the event loop or polling."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                if self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                with self._cond:
+                    if (loop, waiter) in self._async_waiters:
+                        self._async_waiters.remove((loop, waiter))
+                    else:
+                        # Woken just as we were cancelled: pass the free slot on
+                        self._wake_async_waiters()
+                raise
+
+    def _wake_async_waiters(self):
+        # Caller holds _cond. Wake as many coroutines as there are free slots; each re-checks on waking
+        for _ in range(min(len(self._async_waiters), int(self.limit) - self.in_flight)):
+            loop, waiter = self._async_waiters.pop(0)
+            loop.call_soon_threadsafe(_resolve, waiter)
+
+    def leave(self, rate_limited=False):
+        with self._cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if rate_limited:
+                # A burst of 429s from requests already in flight counts as one signal
+                if now - self._last_decrease > 1.0:
+                    self.limit = max(self.min_limit, self.limit / 2)
+                    self._last_decrease = now
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            CONCURRENCY_LIMIT.set(self.limit)
+            self._cond.notify_all()
+            self._wake_async_waiters()
+
+    @contextmanager
+    def slot(self):
+        """Hold one in-flight slot. Call .rate_limited() on the yielded handle when SEC answers 429."""
+        self.enter()
+        outcome = _Outcome()
+        try:
+            yield outcome
+        finally:
+            self.leave(outcome.was_rate_limited)
+
+
+def _resolve(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class _Outcome:
+    was_rate_limited = False
+
+    def rate_limited(self):
+        self.was_rate_limited = True
+
+
+def retry_after_seconds(headers, attempt):
+    """Cooldown for a 429: SEC's Retry-After if present, else exponential from SEC_429_COOLDOWN."""
+    value = headers.get("Retry-After")
+    if value:
+        try:
+            return float(value)
+        except ValueError:
+            pass
+    return SEC_429_COOLDOWN * (2 ** attempt)
+
+
+sec_budget = SharedRateBudget()
+sec_concurrency = AdaptiveConcurrency()
@@ -0,0 +1,125 @@
+"""
+Response cache for /getInfo.
+
+Finished response bodies are stored in a small SQLite file so every gunicorn
+worker on the host shares the same entries. Entries younger than the TTL are
+fresh; older entries are still served (stale-while-revalidate) while exactly
+one worker refreshes them in the background.
+"""
+
+import hashlib
+import os
+import sqlite3
+import tempfile
+import time
+from typing import NamedTuple, Optional
+
+CACHE_PATH = os.environ.get(
+    "GETINFO_CACHE_PATH", os.path.join(tempfile.gettempdir(), "veritas_cache.sqlite3")
+)
+# Seconds an entry is considered fresh
+CACHE_TTL = int(os.environ.get("GETINFO_CACHE_TTL", 900))
+# Seconds past the TTL during which a stale entry may still be served
+STALE_TTL = int(os.environ.get("GETINFO_CACHE_STALE_TTL", 86400))
+# Seconds a background refresh may hold its claim before another worker retries
+REFRESH_CLAIM_TTL = 300
+
+
+class CacheEntry(NamedTuple):
+    body: bytes
+    etag: str
+    stored_at: float
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.stored_at
+
+
+def make_etag(body: bytes) -> str:
+    """Strong validator derived from the exact response bytes."""
+    return hashlib.sha256(body).hexdigest()[:32]
+
+
+class ResponseCache:
+    def __init__(self, path: str = CACHE_PATH, ttl: int = CACHE_TTL, stale_ttl: int = STALE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    body BLOB NOT NULL,
+                    etag TEXT NOT NULL,
+                    stored_at REAL NOT NULL,
+                    refreshing_until REAL NOT NULL DEFAULT 0
+                )
+                """
+            )
+
+    def _connect(self):
+        # A short-lived connection per call keeps this safe across threads and forks
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Return the entry for key, or None if missing or past the stale window."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT body, etag, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        entry = CacheEntry(bytes(row[0]), row[1], row[2])
+        if entry.age > self.ttl + self.stale_ttl:
+            return None
+        return entry
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return entry.age <= self.ttl
+
+    def set(self, key: str, body: bytes) -> CacheEntry:
+        entry = CacheEntry(body, make_etag(body), time.time())
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO responses (key, body, etag, stored_at, refreshing_until)
+                VALUES (?, ?, ?, ?, 0)
+                ON CONFLICT(key) DO UPDATE SET
+                    body = excluded.body,
+                    etag = excluded.etag,
+                    stored_at = excluded.stored_at,
+                    refreshing_until = 0
+                """,
+                (key, sqlite3.Binary(body), entry.etag, entry.stored_at),
+            )
+        return entry
+
+    def keys(self, prefix: str = "") -> list:
+        """Every stored key starting with prefix, stale or not."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT key FROM responses WHERE substr(key, 1, ?) = ? ORDER BY key", (len(prefix), prefix)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def claim_refresh(self, key: str) -> bool:
+        """
+        Atomically claim the right to refresh key. Only one worker across the
+        host wins until the claim is released or expires.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE responses SET refreshing_until = ? WHERE key = ? AND refreshing_until < ?",
+                (now + REFRESH_CLAIM_TTL, key, now),
+            )
+            return cur.rowcount == 1
+
+    def release_refresh(self, key: str):
+        with self._connect() as conn:
+            conn.execute("UPDATE responses SET refreshing_until = 0 WHERE key = ?", (key,))
+
+
+response_cache = ResponseCache()
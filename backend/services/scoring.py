@@ -0,0 +1,165 @@
+"""
+Integrity scoring over /getInfo-shaped data.
+
+Maps the insiders, daily prices and 8-K sentiment of a lookup payload onto
+integrity_score.integrity_score, so screening and batch ranking score trades
+the same way.
+
+Price moves are measured against a benchmark index (BENCHMARK_TICKER). The
+index series is fetched once per BENCHMARK_TTL and each ticker's fitted
+MarketModel is kept in a small LRU, so repeat lookups and every event of an
+issuer reuse the same regression.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from .integrity_score import MarketModel, integrity_score
+from .stockPrice import get_stock_data
+
+BENCHMARK_TICKER = os.environ.get("BENCHMARK_TICKER", "SPY")
+BENCHMARK_TTL = int(os.environ.get("BENCHMARK_TTL", 3600))
+# Per-ticker fitted models kept in memory
+MARKET_MODEL_CACHE_SIZE = 1024
+
+# getSentiment impact labels -> integrity_score sentiment polarity
+IMPACT_SENTIMENT = {"STOCK_UP": "positive", "STOCK_DOWN": "negative"}
+# Vector search confidence labels -> numeric confidence
+CONFIDENCE_WEIGHT = {"High": 0.9, "Moderate": 0.6, "Low": 0.3}
+# Form 4 acquired/disposed code -> trade direction (same reading as the frontend)
+TRADE_TYPE = {"A": "buy", "D": "sell"}
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(str(value)[:10], "%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+def price_series(stock_data):
+    """[{'date', 'price'}] from the payload -> [(datetime, close)] sorted by date."""
+    prices = []
+    for point in stock_data or []:
+        day = parse_date(point.get("date"))
+        if day is not None:
+            prices.append((day, point["price"]))
+    prices.sort(key=lambda p: p[0])
+    return prices
+
+
+_benchmark = {"series": None, "expires": 0.0}
+_benchmark_lock = threading.Lock()
+_models = OrderedDict()
+_models_lock = threading.Lock()
+
+
+def benchmark_series():
+    """{datetime: close} for BENCHMARK_TICKER over two years, cached; empty if the fetch fails."""
+    with _benchmark_lock:
+        if _benchmark["series"] is not None and time.time() < _benchmark["expires"]:
+            return _benchmark["series"]
+        try:
+            # Two years so the estimation window reaches back before a one-year ticker series
+            series = dict(price_series(
+                {"date": p.get("Date"), "price": p.get("Close")} for p in get_stock_data(BENCHMARK_TICKER, period="2y", interval="1d")
+            ))
+            ttl = BENCHMARK_TTL
+        except Exception as e:
+            print(f"Failed to fetch benchmark {BENCHMARK_TICKER}: {e}")
+            series, ttl = {}, 60
+        _benchmark.update(series=series, expires=time.time() + ttl)
+        return series
+
+
+def market_model(ticker, prices, benchmark=None):
+    """Cached MarketModel for ticker's [(datetime, close)] prices, or None without a benchmark."""
+    benchmark = benchmark_series() if benchmark is None else benchmark
+    if not benchmark or not prices:
+        return None
+    # Hashing the closes catches revised or split-adjusted histories over the same dates
+    key = (ticker, prices[0][0], prices[-1][0], hash(tuple(close for _, close in prices)),
+           max(benchmark), hash(tuple(benchmark.values())))
+    with _models_lock:
+        model = _models.get(key)
+        if model is not None:
+            _models.move_to_end(key)
+            return model
+    model = MarketModel(prices, benchmark)
+    with _models_lock:
+        _models[key] = model
+        while len(_models) > MARKET_MODEL_CACHE_SIZE:
+            _models.popitem(last=False)
+    return model
+
+
+def sentiment_events(sentiment):
+    """getSentiment entries -> integrity_score events."""
+    events = []
+    for filing in sentiment or []:
+        day = parse_date(filing.get("filing_date"))
+        prediction = (filing.get("vector_prediction") or {}).get("vector_prediction") or {}
+        if day is None:
+            continue
+        events.append({
+            "date": day,
+            "sentiment": IMPACT_SENTIMENT.get(prediction.get("impact"), "neutral"),
+            "confidence": CONFIDENCE_WEIGHT.get(prediction.get("confidence"), 0.0),
+        })
+    return events
+
+
+def score_trades(insiders, prices, events, market=None):
+    """Score every dated buy/sell trade. Yields one flat record per trade."""
+    for insider in insiders or []:
+        for trade in insider.get("trades", []):
+            trade_type = TRADE_TYPE.get(trade.get("acquired_disposed"))
+            day = parse_date(trade.get("date"))
+            if trade_type is None or day is None:
+                continue
+            integrity, parts = integrity_score(
+                {
+                    "type": trade_type,
+                    "shares": trade.get("shares") or 0,
+                    "insider_holdings": trade.get("shares_owned_after") or None,
+                    "date": day,
+                },
+                prices,
+                events,
+                market,
+            )
+            yield {
+                "insider": insider.get("name"),
+                "insider_cik": insider.get("cik"),
+                "roles": insider.get("roles", []),
+                "date": day.strftime("%Y-%m-%d"),
+                "transaction_code": trade.get("transaction_code"),
+                "type": trade_type,
+                "shares": trade.get("shares"),
+                "price_per_share": trade.get("price_per_share"),
+                "integrity": integrity,
+                **parts,
+            }
+
+
+def score_company(payload, top_n=5, benchmark=None):
+    """
+    Company-level summary of a /getInfo payload: mean trade integrity (0-5,
+    higher is cleaner) and the top_n trades with the highest risk.
+    """
+    prices = price_series(payload.get("stock_data"))
+    scored = list(score_trades(
+        payload.get("insiders"),
+        prices,
+        sentiment_events(payload.get("sentiment")),
+        market_model(payload.get("ticker"), prices, benchmark),
+    ))
+    flagged = sorted((t for t in scored if t["risk"] > 0), key=lambda t: t["risk"], reverse=True)
+    return {
+        "integrity_score": round(sum(t["integrity"] for t in scored) / len(scored), 3) if scored else None,
+        "trades_scored": len(scored),
+        "flagged_trades": flagged[:top_n],
+    }
@@ -0,0 +1,272 @@
+"""
+Async counterparts of the SEC lookup pipeline, used by the ASGI serving mode (asgi.py).
+
+All network I/O goes through one shared httpx.AsyncClient so a single process
+can keep hundreds of lookups in flight. HTML/XML parsing runs on a process pool
+and embedding + vector search on a thread pool, so the event loop never blocks
+on CPU work.
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import httpx
+
+from .form4_parser import find_form4_xml_url, parse_form4_xml, merge_owners, owner_list
+from .sec_parser import UniversalSECParser, extract_links, extract_narrative
+from .sec_for_gemini import aggregate_filings, chunk_votes, embed_filing_chunks, search_pool, sentiment_entry
+from .metrics import SEC_RETRIES, record_sec_response, span
+from .rate_limit import retry_after_seconds, sec_budget, sec_concurrency
+from .sec_client import SEC_MAX_RETRIES, resolve_url
+
+HEADERS = {"User-Agent": "Your Name your.email@example.com"}
+PARSE_WORKERS = int(os.environ.get("ASYNC_PARSE_WORKERS", os.cpu_count() or 1))
+MODEL_WORKERS = int(os.environ.get("ASYNC_MODEL_WORKERS", 2))
+
+_client = None
+_parse_executor = None
+_model_executor = None
+
+
+def _get_client():
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            headers=HEADERS,
+            timeout=30,
+            limits=httpx.Limits(max_connections=sec_concurrency.max_limit * 2),
+            follow_redirects=True,
+        )
+    return _client
+
+
+async def run_parse(func, *args):
+    """Run a pure parsing function on the process pool."""
+    global _parse_executor
+    if _parse_executor is None:
+        # Created lazily inside a threaded server, where fork() can deadlock the children
+        _parse_executor = ProcessPoolExecutor(
+            max_workers=PARSE_WORKERS, mp_context=multiprocessing.get_context("forkserver")
+        )
+    return await asyncio.get_running_loop().run_in_executor(_parse_executor, func, *args)
+
+
+async def run_model(func, *args):
+    """Run embedding / vector search work on the model thread pool."""
+    global _model_executor
+    if _model_executor is None:
+        _model_executor = ThreadPoolExecutor(max_workers=MODEL_WORKERS, thread_name_prefix="model")
+    return await asyncio.get_running_loop().run_in_executor(_model_executor, func, *args)
+
+
+async def aclose():
+    """Release the HTTP client and executors; called on ASGI shutdown."""
+    global _client, _parse_executor, _model_executor
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+    for executor in (_parse_executor, _model_executor):
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+    _parse_executor = _model_executor = None
+
+
+async def _acquire_budget():
+    # The shared budget is SQLite behind a file lock, so it is only touched from a worker thread
+    while True:
+        wait = await asyncio.to_thread(sec_budget.try_acquire)
+        if not wait:
+            return
+        await asyncio.sleep(wait)
+
+
+async def sec_get(url, timeout=30, stage="sec_fetch"):
+    """
+    Async counterpart of sec_client.sec_get: paced by the same host-wide budget
+    and AIMD controller, with the same 429 retry policy.
+    """
+    client = _get_client()
+    for attempt in range(SEC_MAX_RETRIES + 1):
+        await sec_concurrency.enter_async()
+        rate_limited = False
+        try:
+            await _acquire_budget()
+            with span(stage):
+                resp = await client.get(resolve_url(url), timeout=timeout)
+            record_sec_response(resp.status_code, len(resp.content))
+            if resp.status_code == 429:
+                rate_limited = True
+                await asyncio.to_thread(sec_budget.penalize, retry_after_seconds(resp.headers, attempt))
+        finally:
+            sec_concurrency.leave(rate_limited)
+        if not rate_limited:
+            break
+        if attempt < SEC_MAX_RETRIES:
+            SEC_RETRIES.inc()
+    resp.raise_for_status()
+    return resp
+
+
+async def gather_or_cancel(coros):
+    """gather() that cancels the remaining work as soon as one coroutine raises (e.g. on a 429)."""
+    tasks = [asyncio.ensure_future(c) for c in coros]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
+async def _fetch_form4(cik, filing):
+    """Fetch and parse one Form 4 filing. Returns (transactions, owners) or None if skipped."""
+    accession = filing.replace("-", "")
+
+    try:
+        file_resp = await sec_get(f"https://www.sec.gov/Archives/edgar/data/{int(cik)}/{accession}/", timeout=10)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 429:
+            print(f"Rate limit hit while fetching filing directory for {filing}: {e}")
+            raise e
+        print(f"HTTP error fetching filing directory for {filing}: {e}")
+        return None
+    except httpx.RequestError as e:
+        print(f"Error fetching filing directory for {filing}: {e}")
+        return None
+
+    with span("form4_parse"):
+        xml_full_url = await run_parse(find_form4_xml_url, file_resp.text, cik, accession)
+    if xml_full_url is None:
+        return None
+
+    try:
+        xml_resp = await sec_get(xml_full_url, timeout=10)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 429:
+            print(f"Rate limit hit while fetching XML file for {filing}: {e}")
+            raise e
+        print(f"HTTP error fetching XML file for {filing}: {e}")
+        return None
+    except httpx.RequestError as e:
+        print(f"Error fetching XML file for {filing}: {e}")
+        return None
+
+    with span("form4_parse"):
+        transactions, owners = await run_parse(parse_form4_xml, xml_resp.text)
+    if not owners:
+        print(f"No reportingOwner entries found in XML for {filing}")
+        return None
+    return transactions, owners
+
+
+async def get_company_async(cik):
+    """Awaitable version of routes.getInfo.get_company; returns the same owner list."""
+    url = f"https://data.sec.gov/submissions/CIK{cik}.json"
+    try:
+        data = (await sec_get(url, stage="sec_submissions")).json()
+    except httpx.HTTPStatusError as e:
+        print(f"HTTP error fetching company submissions for CIK {cik}: {e}")
+        raise e
+    except httpx.RequestError as e:
+        print(f"Error fetching company submissions for CIK {cik}: {e}")
+        raise e
+
+    form4_filings = [
+        filing
+        for filing, form in zip(data["filings"]["recent"]["accessionNumber"], data["filings"]["recent"]["form"])
+        if form == "4"
+    ]
+
+    results = await gather_or_cancel(_fetch_form4(cik, f) for f in form4_filings[:50])
+
+    # Merge in filing order so the output matches the sync pipeline
+    owner_info = {}
+    for result in results:
+        if result is not None:
+            transactions, owners = result
+            merge_owners(owner_info, owners, transactions)
+    return owner_list(owner_info)
+
+
+async def _get_links(filing_url):
+    try:
+        resp = await sec_get(filing_url)
+        return await run_parse(extract_links, resp.text, filing_url)
+    except Exception as e:
+        return {"error": f"Failed to fetch 10-Q links: {e}"}
+
+
+async def _get_submissions(cik):
+    cik = str(cik).replace('-', '').replace('CIK', '').strip().zfill(10)
+    try:
+        return (await sec_get(f"https://data.sec.gov/submissions/CIK{cik}.json", stage="sec_submissions")).json()
+    except Exception:
+        return None
+
+
+async def parse_sec_filings_async(cik, limit, form_types=["8-K", "10-Q", "10-K"]):
+    """
+    Awaitable version of sec_parser.parse_sec_filings. The submissions document
+    is fetched once for all form types and filing pages are fetched concurrently.
+    """
+    parser = UniversalSECParser()
+    results = {
+        "company": None,
+        "filings": {}
+    }
+
+    data = await _get_submissions(cik)
+    if data is None:
+        return results
+
+    for form_type in form_types:
+        company_info, filings = parser.filings_from_submissions(data, cik, form_type, limit)
+        if not results["company"]:
+            results["company"] = company_info
+
+        if form_type not in ("8-K", "10-Q", "10-K"):
+            results["filings"][form_type] = []
+            continue
+
+        parsed = await asyncio.gather(*(_get_links(f['url']) for f in filings))
+        for parsed_data, filing in zip(parsed, filings):
+            parsed_data["filing_metadata"] = filing
+        results["filings"][form_type] = list(parsed)
+
+    return results
+
+
+async def fetch_document_content_async(url: str):
+    """Awaitable version of sec_for_gemini.fetch_document_content."""
+    try:
+        response = await sec_get(url, timeout=15, stage="8k_fetch")
+    except httpx.HTTPError as e:
+        return {"ERROR": f"Failed to fetch content: {e}"}
+    with span("8k_parse"):
+        return await run_parse(extract_narrative, response.content)
+
+
+async def get_sentiment_async(cik):
+    """
+    Awaitable version of sec_for_gemini.getSentiment. Only the 8-K documents
+    themselves are downloaded; their link pages are not needed for sentiment.
+    """
+    try:
+        data = await _get_submissions(cik)
+        if data is None:
+            raise ValueError(f"No submissions found for CIK {cik}")
+        _, filings = UniversalSECParser().filings_from_submissions(data, cik, "8-K", 10)
+
+        narratives = await asyncio.gather(*(fetch_document_content_async(f["url"]) for f in filings))
+        # All chunks of all filings go through one batched embedding call; the vector
+        # searches then run on the I/O pool so they don't hold a model thread
+        chunked, vectors = await run_model(embed_filing_chunks, narratives)
+        loop = asyncio.get_running_loop()
+        votes = await gather_or_cancel(loop.run_in_executor(search_pool, chunk_votes, v) for v in vectors)
+        analyses = aggregate_filings(narratives, chunked, votes)
+        return [sentiment_entry(filing, analysis) for filing, analysis in zip(filings, analyses)]
+    except Exception as e:
+        print(f"Failed to process sentiment for CIK {cik}: {e}")
+        return None
@@ -0,0 +1,48 @@
+"""
+Single entry point for synchronous requests to SEC EDGAR so every call is
+paced by the host-wide rate budget, counted (requests, 429s, bytes) and timed
+the same way.
+"""
+
+import os
+
+import requests
+
+from .metrics import SEC_RETRIES, record_sec_response, span
+from .rate_limit import retry_after_seconds, sec_budget, sec_concurrency
+
+# Point every SEC request at a stand-in server (e.g. benchmarks/fake_server.py)
+SEC_BASE_URL = os.environ.get("SEC_BASE_URL")
+SEC_HOSTS = ("https://www.sec.gov", "https://data.sec.gov")
+# Retries after a 429 before the response is handed back to the caller
+SEC_MAX_RETRIES = int(os.environ.get("SEC_MAX_RETRIES", 3))
+
+
+def resolve_url(url):
+    """Rewrite an SEC URL to SEC_BASE_URL when a stand-in server is configured."""
+    if SEC_BASE_URL:
+        for host in SEC_HOSTS:
+            if url.startswith(host):
+                return SEC_BASE_URL.rstrip("/") + url[len(host):]
+    return url
+
+
+def sec_get(url, headers=None, timeout=30, stage="sec_fetch"):
+    """
+    requests.get for SEC URLs. A 429 starts a host-wide cooldown and is retried
+    up to SEC_MAX_RETRIES times; callers still decide how to handle
+    raise_for_status() on the final response.
+    """
+    for attempt in range(SEC_MAX_RETRIES + 1):
+        with sec_concurrency.slot() as slot:
+            sec_budget.acquire()
+            with span(stage):
+                resp = requests.get(resolve_url(url), headers=headers, timeout=timeout)
+            record_sec_response(resp.status_code, len(resp.content))
+            if resp.status_code != 429:
+                return resp
+            slot.rate_limited()
+            sec_budget.penalize(retry_after_seconds(resp.headers, attempt))
+        if attempt < SEC_MAX_RETRIES:
+            SEC_RETRIES.inc()
+    return resp
@@ -6,11 +6,22 @@ Parse SEC filings for any company and return clean JSON output
 
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 import requests
 from bs4 import BeautifulSoup
-from .sec_parser import parse_sec_filings
+from .sec_parser import UniversalSECParser, parse_sec_filings, extract_narrative
 from dotenv import load_dotenv
-from .ai_tools import predict_impact_vector_search
+from .ai_tools import (
+    classify_votes,
+    embedding_max_tokens,
+    embedding_tokenizer,
+    get_embeddings,
+    impact_votes,
+    predict_impact_from_vector,
+)
+from .chunking import CHUNK_TOKENS, chunk_filing
+from .metrics import span
+from .sec_client import sec_get
 import re
 load_dotenv()
 
@@ -19,6 +30,11 @@ FINAL_STOP_PHRASES = ["SIGNATURE"]
 INTERNAL_STOP_PHRASES = ["EXHIBIT INDEX", "FINANCIAL STATEMENTS"]
 ITEM_HEADER_PATTERN = re.compile(r"Item\s\d\.\d{2}", re.IGNORECASE)
 
+# A lookup runs one Atlas $vectorSearch per chunk (up to 10 filings x MAX_CHUNKS_PER_FILING),
+# so they are issued concurrently on an I/O pool rather than one after another
+VECTOR_SEARCH_WORKERS = int(os.environ.get("VECTOR_SEARCH_WORKERS", 16))
+search_pool = ThreadPoolExecutor(max_workers=VECTOR_SEARCH_WORKERS, thread_name_prefix="vector-search")
+
 def fetch_document_content(url: str):
     """
     Fetches an SEC 8-K filing and extracts the entire narrative block
@@ -40,49 +56,100 @@ def fetch_document_content(url: str):
             'Accept-Encoding': 'gzip, deflate',
             'Host': 'www.sec.gov'
         }
-        response = requests.get(url, headers=headers, timeout=15)
+        response = sec_get(url, headers=headers, timeout=15, stage="8k_fetch")
         response.raise_for_status() 
         
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
     except requests.exceptions.RequestException as e:
         return {"ERROR": f"Failed to fetch content: {e}"}
-    extracted_data = []
-    # We iterate through all elements that are likely to contain structured text
-    # This loop tracks where we are in the document flow.
-    for tag in soup.find_all(lambda tag: tag.get_text(strip=True) and tag.name not in ['head', 'script', 'style']):
-        text = tag.get_text(strip=True)
-        # Convert it to remove apostrophes and special characters
-        textAlphaNum = re.sub(r'[^\w\s]', '', text)
-        start = "Item"
-        end = "SIGNATURE"
-        start_index = textAlphaNum.find(start)
-        narrative_start = start_index + len(start)
-        signature_index = textAlphaNum.find(end)
-        clean_narrative = re.sub(
-            r'\s+',                                      # Regex to find one or more whitespace characters
-            ' ',                                        # Replace them with a single space
-            textAlphaNum[narrative_start:signature_index]  # Slice the exact substring
-        ).strip() 
-        extracted_data.append(clean_narrative)
-    return extracted_data[0]
-
-def analyze_with_gemini(sec_data):
+    with span("8k_parse"):
+        return extract_narrative(response.content)
+
+def _vote_shares(votes):
+    # Each chunk gets one vote in total, split by its neighbours' weighted impacts
+    total = sum(votes.values())
+    return {impact: score / total for impact, score in votes.items()} if total > 0 else votes
+
+def _add_votes(total, votes):
+    for impact, score in votes.items():
+        total[impact] = total.get(impact, 0) + score
+
+def embed_filing_chunks(narratives):
     """
-    Analyze SEC filings with Gemini Flash 2.0.
-    
-    Args:
-        sec_data: Parsed SEC data dictionary
-    
+    Split each narrative by Item and into token windows the embedding model can
+    read whole (chunking.chunk_filing), then embed every chunk of every filing
+    in one get_embeddings call.
+
     Returns:
-        Dictionary with summary per document, sentiment, and links
+        (chunked, vectors): [(item, text)] per narrative, and one vector per chunk in that order
     """
-    analysis = predict_impact_vector_search(sec_data)
+    tokenizer = embedding_tokenizer()
+    # Leave room for the [CLS]/[SEP] tokens the model adds
+    size = min(CHUNK_TOKENS, embedding_max_tokens() - 2)
+    chunked = [chunk_filing(words, tokenizer, size) if isinstance(words, str) else [] for words in narratives]
+    vectors = get_embeddings([text for chunks in chunked for _, text in chunks])
+    return chunked, vectors
 
-    return {
-        "vector_prediction": analysis,
-        "summary": sec_data
-    }
+def chunk_votes(vector):
+    """Vector search votes for one chunk, None if it could not be embedded or searched."""
+    return impact_votes(vector) if vector else None
+
+def aggregate_filings(narratives, chunked, votes):
+    """
+    Sum per-chunk votes (from chunk_votes, in embed_filing_chunks order) per Item
+    and per filing.
+
+    Returns:
+        One dictionary per narrative: the filing's vector_prediction, the
+        narrative as summary, the per-Item breakdown and the number of chunks
+        searched
+    """
+    votes = iter(votes)
+    analyses = []
+    for words, chunks in zip(narratives, chunked):
+        items = {}
+        for item, _ in chunks:
+            chunk = next(votes)
+            if chunk is None:
+                continue
+            entry = items.setdefault(item, {"votes": {}, "chunks": 0})
+            _add_votes(entry["votes"], _vote_shares(chunk))
+            entry["chunks"] += 1
+
+        if not items:
+            # Nothing to search (fetch error, empty narrative) or every search failed
+            analysis = {"impact": "ERROR", "confidence": "None"} if chunks else predict_impact_from_vector(None)
+        else:
+            filing_votes = {}
+            for entry in items.values():
+                _add_votes(filing_votes, entry["votes"])
+            analysis = classify_votes(filing_votes)
+        analyses.append({
+            "vector_prediction": analysis,
+            "summary": words,
+            "items": [
+                {"item": item, **classify_votes(entry["votes"]), "chunks": entry["chunks"]}
+                for item, entry in items.items()
+            ],
+            "chunks": len(chunks),
+        })
+    return analyses
+
+def analyze_filings(narratives, map_fn=None):
+    """
+    Chunked sentiment for many 8-K narratives at once: one batched embedding
+    call for all their chunks, one vector search per chunk, and the votes
+    summed per Item and per filing.
+
+    Args:
+        narratives: extract_narrative results (error dicts are passed through)
+        map_fn: map used for the vector searches (default: search_pool.map)
+
+    Returns:
+        See aggregate_filings
+    """
+    chunked, vectors = embed_filing_chunks(narratives)
+    votes = list((map_fn or search_pool.map)(chunk_votes, vectors))
+    return aggregate_filings(narratives, chunked, votes)
 
 def get_sec_filings_json(cik, form_types=["8-K"], limit=4):
     """
@@ -102,6 +169,35 @@ def get_sec_filings_json(cik, form_types=["8-K"], limit=4):
     except Exception as e:
         return json.dumps({"error": f"Failed to parse SEC filings: {e}"})
 
+def fetch_8k_narratives(cik, submissions=None, limit=10):
+    """
+    Download a company's most recent 8-Ks and extract their narratives.
+
+    Args:
+        cik: Company CIK number (string or int)
+        submissions: Already-fetched submissions JSON, to skip that request
+        limit: Number of recent 8-Ks
+
+    Returns:
+        List of (filing_metadata, narrative) tuples, newest first
+    """
+    parser = UniversalSECParser()
+    if submissions is None:
+        company_info, filings = parser.get_company_filings(str(cik), "8-K", limit)
+        if not company_info:
+            raise ValueError(f"Could not fetch filings for CIK {cik}")
+    else:
+        _, filings = parser.filings_from_submissions(submissions, cik, "8-K", limit)
+    return [(filing, fetch_document_content(filing["url"])) for filing in filings]
+
+def sentiment_entry(filing, analysis):
+    """One element of the getSentiment list for a filing and its analyze_filings result."""
+    return {
+        "vector_prediction": analysis,
+        "filing_date": filing["filingDate"],
+        "url": filing["url"]
+    }
+
 def getSentiment(cik):
     """Example usage. Will default to Apple if none provided.
 
@@ -110,20 +206,9 @@ def getSentiment(cik):
     """
     
     try:
-        results = parse_sec_filings(str(cik), 10, ["8-K"])
-        anals = []
-        filings = results["filings"]
-        eightklist = filings["8-K"]
-        for item in eightklist:
-            words = fetch_document_content(item["filing_metadata"]["url"])
-            analysis = analyze_with_gemini(words)
-            dat = {
-                "vector_prediction":analysis,
-                "filing_date":item["filing_metadata"]["filingDate"],
-                "url":item["filing_metadata"]["url"]
-            }
-            anals.append(dat)
-        return anals
+        narratives = fetch_8k_narratives(cik)
+        analyses = analyze_filings([words for _, words in narratives])
+        return [sentiment_entry(filing, analysis) for (filing, _), analysis in zip(narratives, analyses)]
         # print(json.dumps(output, ensure_ascii=False, indent=2))
     except Exception as e:
         print(json.dumps({"error": f"Failed to process: {e}"}))
\ No newline at end of file
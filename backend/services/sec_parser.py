@@ -1,7 +1,79 @@
-import requests
 import json
 from urllib.parse import urljoin
-from bs4 import BeautifulSoup
+import re
+from bs4 import BeautifulSoup, CData, NavigableString, Tag
+from .sec_client import sec_get
+
+def extract_links(html, filing_url):
+    """
+    Collect every <a href> on a filing page as an absolute URL.
+    Returns a dict: {"links": [ absolute_urls ]}
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+
+    links = []
+    for a in soup.find_all('a', href=True):
+        href = a['href'].strip()
+        # Skip mailto/javascript/etc.
+        if href.lower().startswith(('mailto:', 'javascript:', '#')):
+            continue
+
+        abs_url = urljoin(filing_url, href)
+        links.append(abs_url)
+
+    return {"links": links}
+
+
+# Elements that start a new line of narrative; chunking.split_items only takes
+# an 'Item X.XX' at the start of a line as a heading
+BLOCK_TAGS = {'p', 'div', 'br', 'tr', 'li', 'table', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+CELL_TAGS = {'td', 'th'}
+SKIP_TAGS = {'head', 'script', 'style'}
+
+
+def _text_lines(node, parts):
+    """Append node's text to parts, whitespace collapsed, with a newline around every block element."""
+    for child in node.children:
+        if isinstance(child, Tag):
+            if child.name in SKIP_TAGS:
+                continue
+            block = child.name in BLOCK_TAGS
+            if block:
+                parts.append("\n")
+            _text_lines(child, parts)
+            parts.append("\n" if block else " " if child.name in CELL_TAGS else "")
+        elif type(child) in (NavigableString, CData):
+            # Source line wraps are not boundaries
+            parts.append(re.sub(r'\s+', ' ', child))
+
+
+def extract_narrative(content):
+    """
+    Extract the narrative block following the first 'Item X.XX' disclosure of an
+    8-K document, stopping at the SIGNATURE block. Each block element of the
+    filing (paragraph, div, table row, ...) becomes one line.
+    """
+    soup = BeautifulSoup(content, 'html.parser')
+
+    # The outermost element with text holds the whole document
+    root = soup.find(lambda tag: tag.get_text(strip=True) and tag.name not in SKIP_TAGS)
+    if root is None:
+        raise IndexError("No text in document")
+    parts = []
+    _text_lines(root, parts)
+    # Convert it to remove apostrophes and special characters
+    textAlphaNum = re.sub(r'[^\w\s]', '', "".join(parts))
+    start = "Item"
+    end = "SIGNATURE"
+    start_index = textAlphaNum.find(start)
+    narrative_start = start_index + len(start)
+    signature_index = textAlphaNum.find(end)
+    lines = (
+        re.sub(r'[^\S\n]+', ' ', line).strip()           # One space between words, one line per block
+        for line in textAlphaNum[narrative_start:signature_index].split("\n")  # Slice the exact substring
+    )
+    return "\n".join(line for line in lines if line)
+
 
 class UniversalSECParser:
     """
@@ -22,50 +94,58 @@ class UniversalSECParser:
         url = f"https://data.sec.gov/submissions/CIK{cik}.json"
 
         try:
-            response = requests.get(url, headers=self.headers, timeout=30)
+            response = sec_get(url, headers=self.headers, timeout=30, stage="sec_submissions")
             response.raise_for_status()
             data = response.json()
 
-            company_info = {
-                "name": data.get('name', 'Unknown'),
-                "cik": cik.lstrip('0'),
-                "sic": data.get('sic', ''),
-                "sicDescription": data.get('sicDescription', ''),
-                "phone": data.get('phone', ''),
-                "businessAddress": data.get('businessAddress', {})
-            }
-
-            recent_filings = data.get('filings', {}).get('recent', {})
-
-            if recent_filings:
-                forms = recent_filings.get('form', [])
-                filing_dates = recent_filings.get('filingDate', [])
-                accession_numbers = recent_filings.get('accessionNumber', [])
-                primary_documents = recent_filings.get('primaryDocument', [])
-
-                filtered_filings = []
-                count = 0
-
-                for i, form in enumerate(forms):
-                    if form == form_type and count < limit:
-                        filing_info = {
-                            "form": form,
-                            "filingDate": filing_dates[i],
-                            "accessionNumber": accession_numbers[i],
-                            "primaryDocument": primary_documents[i],
-                            "url": self._construct_filing_url(cik.lstrip('0'), accession_numbers[i], primary_documents[i])
-                        }
-                        filtered_filings.append(filing_info)
-                        count += 1
-
-                return company_info, filtered_filings
-
-            return company_info, []
+            return self.filings_from_submissions(data, cik, form_type, limit)
 
         except Exception:
             # Keep same surface behavior you had
             return None, []
 
+    def filings_from_submissions(self, data, cik, form_type, limit):
+        """
+        Pick the most recent filings of form_type out of a submissions JSON document.
+        Returns (company_info, filings).
+        """
+        cik = str(cik).replace('-', '').replace('CIK', '').strip().zfill(10)
+        company_info = {
+            "name": data.get('name', 'Unknown'),
+            "cik": cik.lstrip('0'),
+            "sic": data.get('sic', ''),
+            "sicDescription": data.get('sicDescription', ''),
+            "phone": data.get('phone', ''),
+            "businessAddress": data.get('businessAddress', {})
+        }
+
+        recent_filings = data.get('filings', {}).get('recent', {})
+
+        if recent_filings:
+            forms = recent_filings.get('form', [])
+            filing_dates = recent_filings.get('filingDate', [])
+            accession_numbers = recent_filings.get('accessionNumber', [])
+            primary_documents = recent_filings.get('primaryDocument', [])
+
+            filtered_filings = []
+            count = 0
+
+            for i, form in enumerate(forms):
+                if form == form_type and count < limit:
+                    filing_info = {
+                        "form": form,
+                        "filingDate": filing_dates[i],
+                        "accessionNumber": accession_numbers[i],
+                        "primaryDocument": primary_documents[i],
+                        "url": self._construct_filing_url(cik.lstrip('0'), accession_numbers[i], primary_documents[i])
+                    }
+                    filtered_filings.append(filing_info)
+                    count += 1
+
+            return company_info, filtered_filings
+
+        return company_info, []
+
     def _construct_filing_url(self, cik, accession_number, primary_document):
         """Construct the URL to the actual filing document"""
         accession_clean = accession_number.replace('-', '')
@@ -77,21 +157,9 @@ class UniversalSECParser:
         Returns a dict: {"links": [ absolute_urls ]}
         """
         try:
-            resp = requests.get(filing_url, headers=self.headers, timeout=30)
+            resp = sec_get(filing_url, headers=self.headers, timeout=30)
             resp.raise_for_status()
-            soup = BeautifulSoup(resp.text, 'html.parser')
-
-            links = []
-            for a in soup.find_all('a', href=True):
-                href = a['href'].strip()
-                # Skip mailto/javascript/etc.
-                if href.lower().startswith(('mailto:', 'javascript:', '#')):
-                    continue
-
-                abs_url = urljoin(filing_url, href)
-                links.append(abs_url)
-
-            return {"links": links}
+            return extract_links(resp.text, filing_url)
 
         except Exception as e:
             return {"error": f"Failed to fetch 10-Q links: {e}"}
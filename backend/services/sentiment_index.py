@@ -0,0 +1,270 @@
+"""
+Incremental indexer for the labeled sentiment vectors.
+
+Every labeled (text, impact) snippet is one document keyed by a content hash,
+tagged with the labeled-set versions it belongs to:
+
+    {_id: sha256(model, text, impact), text_hash, text_snippet, impact,
+     plot_embedding, versions: [3, 4], timestamp}
+
+A build tags the current labeled set as a new version, in batches:
+snippets already stored only gain the new tag, relabeled snippets reuse the
+stored embedding of the same text, and only genuinely new text is embedded
+(one get_embeddings call per batch) and bulk upserted. Publishing is a single
+write to the meta pointer that vector search filters on, so serving moves
+from the old set to the new one at once and never sees a partial or empty
+index. Atlas builds search indexes asynchronously, so a build that creates the
+vector index or adds its versions filter waits until Atlas reports the new
+definition queryable before publishing. Documents outside the active and
+previous versions are then removed. An empty labeled set is refused rather
+than published, builds take a lock document in the meta collection, and the
+publish is a compare-and-set on the version the build started from.
+
+Run from backend/ with a JSONL ({"text", "impact"} per line) or CSV
+(text,impact) file:
+
+    python -m services.sentiment_index labeled_snippets.jsonl
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import time
+import uuid
+from datetime import datetime
+
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from pymongo.operations import SearchIndexModel
+
+from .ai_tools import (
+    EMBEDDING_MODEL_NAME,
+    VECTOR_DIMENSIONS,
+    VECTOR_INDEX_NAME,
+    active_index_version,
+    db_collection,
+    get_embeddings,
+    meta_collection,
+)
+
+# Snippets hashed, looked up and written per round trip
+INDEX_BATCH_SIZE = int(os.environ.get("SENTIMENT_INDEX_BATCH", 512))
+# Seconds to wait for Atlas to finish (re)building the vector index before giving up
+INDEX_READY_TIMEOUT = float(os.environ.get("SENTIMENT_INDEX_READY_TIMEOUT", 600))
+INDEX_READY_POLL = 5
+# Seconds a build holds the build lock before another build may take it over
+BUILD_LOCK_TTL = float(os.environ.get("SENTIMENT_INDEX_LOCK_TTL", 3600))
+IMPACTS = ("STOCK_UP", "STOCK_DOWN", "NEUTRAL")
+
+
+def text_hash(text):
+    # The model is part of the key so switching models re-embeds everything
+    return hashlib.sha256(f"{EMBEDDING_MODEL_NAME}\0{text}".encode("utf-8")).hexdigest()
+
+
+def snippet_id(text, impact):
+    return hashlib.sha256(f"{text_hash(text)}\0{impact}".encode("utf-8")).hexdigest()
+
+
+def load_labeled(path):
+    """(text, impact) pairs from a JSONL or CSV file."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            return [(row["text"], row["impact"]) for row in csv.DictReader(f)]
+        return [(row["text"], row["impact"]) for row in map(json.loads, f) if row]
+
+
+VECTOR_INDEX_DEFINITION = {
+    "fields": [
+        {"type": "vector", "path": "plot_embedding", "numDimensions": VECTOR_DIMENSIONS, "similarity": "cosine"},
+        {"type": "filter", "path": "versions"},
+    ]
+}
+
+
+def ensure_vector_index():
+    """
+    Create the Atlas vector index, or add the versions filter field to one built
+    before versioning, plus the text_hash index _tag_batch looks embeddings up by.
+    """
+    db_collection.create_index("text_hash")
+    existing = {index["name"]: index for index in db_collection.list_search_indexes()}
+    if VECTOR_INDEX_NAME not in existing:
+        db_collection.create_search_index(
+            SearchIndexModel(VECTOR_INDEX_DEFINITION, name=VECTOR_INDEX_NAME, type="vectorSearch")
+        )
+    elif existing[VECTOR_INDEX_NAME].get("latestDefinition") != VECTOR_INDEX_DEFINITION:
+        db_collection.update_search_index(VECTOR_INDEX_NAME, VECTOR_INDEX_DEFINITION)
+
+
+def wait_for_vector_index(timeout=INDEX_READY_TIMEOUT):
+    """
+    Block until Atlas serves the current vector index definition. Until then a
+    $vectorSearch filtering on versions fails, so publishing must wait for it.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        index = next(iter(db_collection.list_search_indexes(VECTOR_INDEX_NAME)), {})
+        if (index.get("queryable") and index.get("status") == "READY"
+                and index.get("latestDefinition") == VECTOR_INDEX_DEFINITION):
+            return
+        if index.get("status") == "FAILED" or time.monotonic() >= deadline:
+            raise RuntimeError(
+                f"Vector index {VECTOR_INDEX_NAME} not queryable (status {index.get('status')}); aborting before publishing"
+            )
+        print(f"Waiting for vector index {VECTOR_INDEX_NAME} (status {index.get('status')})...")
+        time.sleep(INDEX_READY_POLL)
+
+
+def _next_version():
+    # A counter separate from the active pointer, so an aborted build never reuses its version
+    counter = meta_collection.find_one_and_update(
+        {"_id": "counter"}, {"$inc": {"version": 1}}, upsert=True, return_document=ReturnDocument.AFTER
+    )
+    return counter["version"]
+
+
+def _acquire_build_lock():
+    """Take the lock document in the meta collection, or raise if another build holds it. Returns the owner token."""
+    token, now = uuid.uuid4().hex, time.time()
+    try:
+        # Matches a free or expired lock; if the lock is held the upsert collides on _id
+        meta_collection.find_one_and_update(
+            {"_id": "build_lock", "expires": {"$lt": now}},
+            {"$set": {"owner": token, "expires": now + BUILD_LOCK_TTL}},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        raise RuntimeError("Another sentiment index build is running; try again when it finishes")
+    return token
+
+
+def _release_build_lock(token):
+    meta_collection.delete_one({"_id": "build_lock", "owner": token})
+
+
+def _tag_batch(batch, version):
+    """Tag one batch of (id, text, impact) with version. Returns (already stored, reused embeddings, embedded)."""
+    ids = [sid for sid, _, _ in batch]
+    stored = {doc["_id"] for doc in db_collection.find({"_id": {"$in": ids}}, {"_id": 1})}
+    missing = [(sid, text, impact) for sid, text, impact in batch if sid not in stored]
+
+    hashes = list({text_hash(text) for _, text, _ in missing})
+    vectors = {
+        doc["text_hash"]: doc["plot_embedding"]
+        for doc in db_collection.find({"text_hash": {"$in": hashes}}, {"text_hash": 1, "plot_embedding": 1})
+    }
+    reused = sum(1 for _, text, _ in missing if text_hash(text) in vectors)
+    new_texts = list(dict.fromkeys(text for _, text, _ in missing if text_hash(text) not in vectors))
+    for text, vector in zip(new_texts, get_embeddings(new_texts)):
+        if vector is None:
+            raise RuntimeError("Embedding failed; aborting build before publishing")
+        vectors[text_hash(text)] = vector
+
+    now = datetime.utcnow()
+    operations = [UpdateOne({"_id": sid}, {"$addToSet": {"versions": version}}) for sid in stored]
+    operations += [
+        UpdateOne(
+            {"_id": sid},
+            {
+                "$setOnInsert": {
+                    "text_hash": text_hash(text),
+                    "text_snippet": text,
+                    "impact": impact,
+                    "plot_embedding": vectors[text_hash(text)],
+                    "timestamp": now,
+                },
+                "$addToSet": {"versions": version},
+            },
+            upsert=True,
+        )
+        for sid, text, impact in missing
+    ]
+    if operations:
+        db_collection.bulk_write(operations, ordered=False)
+    return len(stored), reused, len(new_texts)
+
+
+def build_index(labeled, batch_size=INDEX_BATCH_SIZE):
+    """
+    Publish labeled (text, impact) pairs as the active sentiment vector set.
+    Idempotent: a labeled set identical to the active one is a no-op.
+    Returns the active version.
+    """
+    if db_collection is None or meta_collection is None:
+        print("Cannot build index: MongoDB or local model not initialized.")
+        return None
+
+    snippets = {}
+    for text, impact in labeled:
+        text = " ".join(str(text).split())
+        if impact not in IMPACTS:
+            raise ValueError(f"Unknown impact {impact!r} for snippet {text[:60]!r}")
+        if text:
+            snippets[snippet_id(text, impact)] = (text, impact)
+    if not snippets:
+        # Publishing an empty set would prune every vector and leave serving with nothing
+        raise ValueError("No labeled snippets to publish; the active index is unchanged")
+
+    token = _acquire_build_lock()
+    try:
+        return _build_locked(snippets, batch_size)
+    finally:
+        _release_build_lock(token)
+
+
+def _build_locked(snippets, batch_size):
+    set_hash = hashlib.sha256("\n".join(sorted(snippets)).encode("utf-8")).hexdigest()
+
+    active = meta_collection.find_one({"_id": "active"}) or {}
+    if active.get("set_hash") == set_hash:
+        print(f"Sentiment index already at version {active['version']} ({len(snippets)} snippets); nothing to do.")
+        return active["version"]
+
+    ensure_vector_index()
+    version = _next_version()
+    started = time.perf_counter()
+    items = [(sid, text, impact) for sid, (text, impact) in snippets.items()]
+    kept = reused = embedded = 0
+    for i in range(0, len(items), batch_size):
+        k, r, e = _tag_batch(items[i:i + batch_size], version)
+        kept, reused, embedded = kept + k, reused + r, embedded + e
+    print(f"Tagged {len(items)} snippets as version {version}: {kept} unchanged, {reused} relabeled, {embedded} embedded "
+          f"in {time.perf_counter() - started:.1f}s")
+
+    wait_for_vector_index()
+    # The swap: one document write moves every reader to the new version. It is a compare-and-set on the
+    # version this build started from, so a build that lost a race never overwrites the winner
+    try:
+        swapped = meta_collection.replace_one(
+            {"_id": "active", "version": active.get("version")},
+            {"version": version, "previous": active.get("version"), "set_hash": set_hash,
+             "snippets": len(items), "published_at": datetime.utcnow()},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        swapped = None
+    if swapped is None or (swapped.matched_count == 0 and swapped.upserted_id is None):
+        raise RuntimeError(f"Active version changed during the build; version {version} was not published")
+    active_index_version(refresh=True)
+
+    # Keep the previous version for readers still holding it, drop everything older
+    keep = [v for v in (version, active.get("version")) if v is not None]
+    db_collection.update_many({"versions": {"$elemMatch": {"$nin": keep}}}, {"$pull": {"versions": {"$nin": keep}}})
+    removed = db_collection.delete_many({"$or": [{"versions": {"$size": 0}}, {"versions": {"$exists": False}}]})
+    print(f"Published version {version}; removed {removed.deleted_count} unused vectors.")
+    return version
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally rebuild the labeled sentiment vector set.")
+    parser.add_argument("path", help="labeled snippets as JSONL ({\"text\", \"impact\"}) or CSV (text,impact)")
+    parser.add_argument("--batch-size", type=int, default=INDEX_BATCH_SIZE)
+    args = parser.parse_args()
+    build_index(load_labeled(args.path), args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,11 @@
+import os
+import requests
 import yfinance as yf
 from datetime import datetime
 
+# Serve prices from a stand-in server instead of Yahoo (e.g. benchmarks/fake_server.py)
+PRICE_SOURCE_URL = os.environ.get("PRICE_SOURCE_URL")
+
 # Get current date
 current_date = datetime.now().strftime("%Y-%m-%d")
 # Get date one year ago
@@ -10,6 +15,11 @@ def get_stock_data(ticker, period="1y", interval="1d"):
     """
     Fetch stock data for a given ticker symbol over a specified period and interval.
     """
+    if PRICE_SOURCE_URL:
+        resp = requests.get(f"{PRICE_SOURCE_URL.rstrip('/')}/prices/{ticker}.json", timeout=30)
+        resp.raise_for_status()
+        return resp.json()
+
     stock = yf.Ticker(ticker)
     hist = stock.history(period=period, interval=interval)
     
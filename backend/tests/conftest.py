@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+# Settings are read at import, so point the caches at a scratch directory before any app module loads
+_scratch = tempfile.mkdtemp(prefix="veritas-tests-")
+os.environ.setdefault("GETINFO_CACHE_PATH", os.path.join(_scratch, "cache.sqlite3"))
+os.environ.setdefault("SEC_RATE_DB", os.path.join(_scratch, "sec_rate.sqlite"))
+# Use the embedding model only if it is already cached; tests never need it
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
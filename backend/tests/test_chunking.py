@@ -0,0 +1,63 @@
+from services.chunking import chunk_filing, split_items, token_windows
+from services.sec_parser import extract_narrative
+
+
+def _filing(*blocks):
+    paragraphs = "".join(f"<p>{block}</p>" for block in blocks)
+    return f"<html><head><title>8-K</title></head><body><div>{paragraphs}<p>SIGNATURE</p></div></body></html>".encode()
+
+
+def test_title_quoting_cross_reference_stays_in_its_item():
+    narrative = extract_narrative(_filing(
+        "Item 2.02 Results of Operations and Financial Condition",
+        "Revenue rose 12%, as described in Item 5.02 Departure of Directors below.",
+        "Item 5.02 Departure of Directors",
+        "The chief financial officer resigned.",
+    ))
+
+    items = split_items(narrative)
+
+    assert [item for item, _ in items] == ["Item 2.02", "Item 5.02"]
+    assert "as described in Item 502 Departure of Directors below" in items[0][1]
+    assert items[1][1] == "Departure of Directors\nThe chief financial officer resigned"
+
+
+def test_extract_narrative_keeps_block_boundaries_only():
+    narrative = extract_narrative(
+        b"<div><p>Item&#160;8.01 Other\n   Events</p><table><tr><td>Item 9.01</td><td>Exhibits</td></tr></table>"
+        b"<p>SIGNATURE</p></div>"
+    )
+
+    assert narrative == "801 Other Events\nItem 901 Exhibits"
+
+
+def test_split_items_merges_repeats_and_drops_exhibits():
+    narrative = "202 Results\nRevenue rose\nItem 901 Exhibits\n991 Press release\nItem 202 Margins widened"
+
+    assert split_items(narrative) == [("Item 2.02", "Results\nRevenue rose Margins widened")]
+    assert split_items("901 Exhibits only") == [("Item 9.01", "Exhibits only")]
+
+
+def test_split_items_without_headings():
+    assert split_items("Item 1234 is not an 8-K item") == [("Filing", "Item 1234 is not an 8-K item")]
+    assert split_items("  ") == []
+
+
+def test_token_windows_word_fallback_overlaps():
+    text = " ".join(f"w{i}" for i in range(100))
+
+    windows = token_windows(text, size=26, overlap=13)
+
+    # Without a tokenizer a window is size / 1.3 words, overlapping by overlap / 1.3
+    assert [len(w.split()) for w in windows] == [20] * 9
+    assert windows[0].split()[-10:] == windows[1].split()[:10]
+    assert windows[-1].endswith("w99")
+    assert token_windows("") == []
+
+
+def test_chunk_filing_takes_windows_round_robin():
+    narrative = "202 " + " ".join(["up"] * 60) + "\nItem 701 " + " ".join(["down"] * 60)
+
+    chunks = chunk_filing(narrative, size=26, max_chunks=3)
+
+    assert [item for item, _ in chunks] == ["Item 2.02", "Item 7.01", "Item 2.02"]
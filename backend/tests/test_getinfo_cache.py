@@ -0,0 +1,45 @@
+import pytest
+
+import routes.getInfo as getInfo
+from app import app
+from services.response_cache import response_cache
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+def _payload(CIK, sentiment):
+    return getInfo.company_payload(CIK, [], "TEST", [], sentiment)
+
+
+def test_payload_with_failed_sentiment_is_not_cached(client, monkeypatch):
+    calls = []
+    monkeypatch.setattr(getInfo, "build_company_payload", lambda CIK: calls.append(CIK) or _payload(CIK, None))
+
+    for _ in range(2):
+        response = client.get("/getInfo/900001")
+        assert response.status_code == 200
+        assert response.headers["X-Cache"] == "BYPASS"
+        assert response.headers["Cache-Control"] == "no-store"
+        assert response.get_json()["sentiment"] is None
+
+    assert calls == ["900001", "900001"]
+    assert response_cache.get(getInfo.cache_key("900001")) is None
+
+
+def test_payload_with_sentiment_is_cached(client, monkeypatch):
+    monkeypatch.setattr(getInfo, "build_company_payload", lambda CIK: _payload(CIK, []))
+
+    assert client.get("/getInfo/900002").headers["X-Cache"] == "MISS"
+    assert client.get("/getInfo/0000900002").headers["X-Cache"] == "HIT"
+
+
+def test_failed_refresh_keeps_the_last_good_entry():
+    good = getInfo.store_payload("900003", _payload("900003", []))
+
+    entry = getInfo.store_payload("900003", _payload("900003", None))
+
+    assert entry.etag != good.etag
+    assert response_cache.get(getInfo.cache_key("900003")).etag == good.etag